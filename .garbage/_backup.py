@@ -1,37 +1,26 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
 import argparse
-import time
+from typing import TYPE_CHECKING
 
 from common import app_logger
-from common import utils
-from common.convertors import time_to_string
+from common import cli
 from config import configure
-from s3.backup import S3Backup
-from s3.storage import S3Storage
 
-_progress_visible = 'visible'
-_progress_hidden = 'hidden'
-
-_progress_visible_2_bool = {
-    _progress_visible: True,
-    _progress_hidden: False
-}
-
-_bool_2_progress_visible = {
-    True: _progress_visible,
-    False: _progress_hidden
-}
+if TYPE_CHECKING:
+    from s3.storage import S3Storage
 
 logger = app_logger.get_logger(__name__)
 
 
 def process(
-        storage: S3Storage,
+        storage: 'S3Storage',
         local_path: str = None,
         remote_path: str = None,
         show_progress: bool = True,
         all_files: bool = False):
+    from s3.backup import S3Backup
+
     backup = S3Backup(bucket=storage.bucket)
     try:
         backup.storage = storage
@@ -43,16 +32,12 @@ def process(
         del backup
 
 
-def main():
-    start_time = time.time()
-
+def _main():
     try:
         parser = argparse.ArgumentParser(prog='s3_upload')
 
-        parser.add_argument('--progress-bar', type=str, choices=list(_progress_visible_2_bool.keys()),
-                            default=_progress_visible,
-                            help='visible or hidden progress bar (default: %(default)s)')
-        parser.add_argument('--all', dest='backup_all', help="Backuping all operations.")
+        cli.add_progress_argument(parser, '--progress-bar')
+        parser.add_argument('--all', dest='backup_all', action='store_true', help="Backuping all operations.")
         parser.add_argument('-b', dest='bucket', type=str, metavar='BUCKET',
                             help='name of S3 bucket (default: %(default)s)', default=configure.S3_BUCKET_NAME)
         parser.add_argument('--local-path', dest='local_path', type=str, metavar='LOCAL PATH', required=True,
@@ -62,35 +47,24 @@ def main():
 
         args = parser.parse_args()
 
-        logger.debug(vars(args))
+        logger.debug('Arguments: %s', vars(args))
 
-        show_progress = True
+        show_progress = args.progress_bar == cli.PROGRESS_VISIBLE
 
-        if args.progress_bar is not None:
-            if args.progress_bar.lower() == 'visible':
-                show_progress = True
-            if args.progress_bar.lower() == 'hidden':
-                show_progress = False
-
-        if args.progress_bar is not None:
-            if args.progress_bar in _progress_visible_2_bool:
-                show_progress = _progress_visible_2_bool[args.progress_bar]
+        from s3.storage import S3Storage
 
         s3storage = S3Storage(bucket=args.bucket)
         try:
-            process(s3storage, args.local_path, args.remote_path, show_progress, args.backup_all is not None)
+            process(s3storage, args.local_path, args.remote_path, show_progress, args.backup_all)
         finally:
             del s3storage
 
-    except KeyboardInterrupt:
-        logger.warning('User terminate program!')
     except Exception as exception:
         logger.critical(f"Exception {type(exception).__name__} with message \"{exception}\" is not caught")
-    finally:
-        end_time = time.time()
-        logger.info(
-            f'Elapsed time is {time_to_string(end_time - start_time, use_milliseconds=True, human=True)}.'
-        )
+
+
+def main():
+    cli.run(_main, logger)
 
 
 if __name__ == '__main__':
@@ -1,40 +1,19 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
 import argparse
-import time
 
 from common import app_logger
-from common import utils
+from common import cli
 from config import configure
-from s3.restore import S3Restore
-
-_progress_visible = 'visible'
-_progress_hidden = 'hidden'
-
-_progress_visible_2_bool = {
-    _progress_visible: True,
-    _progress_hidden: False
-}
-
-_bool_2_progress_visible = {
-    True: _progress_visible,
-    False: _progress_hidden
-}
 
 logger = app_logger.get_logger(__name__)
 
 
-def main():
-    start_time = time.time()
-
+def _main():
     try:
         parser = argparse.ArgumentParser(prog='s3_upload')
 
-        parser.add_argument('-p', '--progress',
-                            dest='progress_bar', type=str,
-                            choices=list(_progress_visible_2_bool.keys()),
-                            default=_progress_visible,
-                            help='visible or hidden progress bar (default: %(default)s)')
+        cli.add_progress_argument(parser, '-p', '--progress')
 
         parser.add_argument('-b', '--bucket',
                             dest='bucket', type=str, metavar='BUCKET',
@@ -57,24 +36,23 @@ def main():
 
         logger.debug(vars(args))
 
+        from s3.restore import S3Restore
+
         restore = S3Restore(bucket=args.bucket)
         try:
-            restore.force = args.force if 'force' in args and args.force is not None else False
-            restore.show_progress = _progress_visible_2_bool[args.progress_bar]
+            restore.force = getattr(args, 'force', False)
+            restore.show_progress = args.progress_bar == cli.PROGRESS_VISIBLE
 
             restore.process(local_path=args.local_path, remote_path=args.remote_path)
         finally:
             del restore
 
-    except KeyboardInterrupt:
-        logger.warning('User terminate program!')
     except Exception as exception:
         logger.critical(f"Exception {type(exception).__name__} with message \"{exception}\" is not caught")
-    finally:
-        end_time = time.time()
-        logger.info(
-            f'Elapsed time is {utils.time_to_string(end_time - start_time, use_milliseconds=True, human=True)}.'
-        )
+
+
+def main():
+    cli.run(_main, logger)
 
 
 if __name__ == '__main__':
@@ -3,17 +3,16 @@ from typing import Union
 
 from progress.progress_bar import ProgressBar
 
-from common.utils import get_parameter
-
 
 class ProgressBackupDatabase(ProgressBar):
     def __init__(self, caption: Union[str, bytes]):
         super(ProgressBackupDatabase, self).__init__(caption=caption, max_value=100)
 
-    def __call__(self, *args, **kwargs):
-        value = get_parameter(args, 0, (int, float))
-        min_value = get_parameter(args, 1, (int, float))
-        max_value = get_parameter(args, 2, (int, float))
+    def __call__(self, value: Union[int, float], min_value: Union[int, float], max_value: Union[int, float]):
+        if __debug__:
+            assert isinstance(value, (int, float))
+            assert isinstance(min_value, (int, float))
+            assert isinstance(max_value, (int, float))
 
         self.min_value = min_value
         self.max_value = max_value
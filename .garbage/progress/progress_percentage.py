@@ -1,8 +1,12 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import os
+from typing import Optional
+
 from progress.progress_bar import ProgressBar
 
 
 class ProgressPercentage(ProgressBar):
-    def __init__(self, filename):
-        size = os.path.getsize(filename)
+    def __init__(self, filename, size: Optional[int] = None):
+        if size is None:
+            size = os.path.getsize(filename)
         super().__init__(filename, max_value=size)
@@ -1,9 +1,8 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
-import os
 from typing import Dict, Any, Optional
 
 from common.app_logger import get_logger
-from common.convertors import remove_start_path_sep, append_end_path_sep
+from common.convertors import append_end_path_sep
 from common.utils import get_parameter
 from s3._base._base import S3Base, INFO_OLD, INFO_NEW, OP_BACKUP, INFO_FIELD_NAME
 
@@ -37,6 +36,10 @@ class S3Backup(S3Base):
 
         operations_list = [operation for _, operation in files.items() if operation.get(INFO_NEW, None) is not None]
 
+        local_prefix = self._local_path
+        local_prefix_len = len(local_prefix)
+        archive_prefix = append_end_path_sep(self._archive_path)
+
         for operation_info in operations_list:
             local_file_info = operation_info.get(INFO_NEW)
             remote_file_info = operation_info.get(INFO_OLD)
@@ -45,14 +48,12 @@ class S3Backup(S3Base):
 
             if remote_file_info is not None:
                 remote_file_name = remote_file_info.get('name')
+            elif local_file_name.startswith(local_prefix):
+                remote_file_name = archive_prefix + local_file_name[local_prefix_len:].lstrip('/\\')
             else:
                 remote_file_name = local_file_name
-                if remote_file_name.startswith(self._local_path):
-                    remote_file_name = remote_file_name[len(self._local_path):]
-                    remote_file_name = remove_start_path_sep(remote_file_name)
-                    remote_file_name = os.path.join(append_end_path_sep(self._archive_path), remote_file_name)
 
-            logger.info(f'Upload file {remote_file_name}...')
+            logger.info('Upload file %s...', remote_file_name)
             self.storage.upload_file(local_file_path=local_file_name, remote_file_path=remote_file_name)
 
     def process(self, *args, **kwargs) -> None:
@@ -2,12 +2,16 @@
 
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
+import atexit
+import functools
 import logging
 import os
+import queue
 import re
 import sys
 from logging import Formatter
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Tuple
 
 from common import consts
 from common.convertors import append_end_path_sep
@@ -15,6 +19,9 @@ from common.convertors import append_end_path_sep
 LOG_FILE_FMT = "%(levelname)s - %(asctime)s - %(name)s - %(module)s.%(funcName)s - %(threadName)s - %(message)s in %(pathname)s:%(lineno)d"
 LOG_CONSOLE_FMT = "[%(levelname)s]: %(message)s"
 
+_EXC_RE = re.compile(r"(Except(ion)?)\s+(\w+)\s*:\s*(.*)$", re.I | re.X)
+_EXC_REPL = consts.RED + r"\1" " " + consts.BOLD + r"\3" + consts.NBOLD + consts.DEF + ": " + consts.BLACK + r"\4" + consts.DEF
+
 
 class DecorateStreamHandler(logging.StreamHandler):
     def __init__(self, stream=None):
@@ -38,9 +45,7 @@ class DecorateStreamHandler(logging.StreamHandler):
             def format(self, record: logging.LogRecord):
                 msg = super().format(record)
 
-                msg = re.sub(r"(Except(ion)?)\s+(\w+)\s*\:\s*(.*)$",
-                             consts.RED + r"\1" " " + consts.BOLD + r"\3" + consts.NBOLD + consts.DEF + ": " + consts.BLACK + r"\4" + consts.DEF,
-                             msg, flags=re.I or re.X)
+                msg = _EXC_RE.sub(_EXC_REPL, msg)
 
                 if record.levelname in self.__colors:
                     color_begin, color_end = self.__colors[record.levelname]
@@ -68,16 +73,19 @@ class CustomFilterOnlyFor(CustomFilter):
         return False
 
 
-def get_logger(name: str):
+def _compute_log_dir() -> str:
     log_dir = os.path.dirname(sys.argv[0])
     log_dir = append_end_path_sep(log_dir)
-    log_dir = os.path.join(log_dir, 'log/')
+    return os.path.join(log_dir, 'log/')
 
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+_LOG_DIR = _compute_log_dir()
+os.makedirs(_LOG_DIR, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_handlers() -> Tuple[logging.Handler, ...]:
+    log_dir = _LOG_DIR
 
     console_handler = DecorateStreamHandler()
     console_handler.setLevel(logging.INFO)
@@ -100,9 +108,26 @@ def get_logger(name: str):
     exp_errors_file_handler.addFilter(CustomFilter())
     exp_errors_file_handler.setFormatter(Formatter(LOG_FILE_FMT))
 
-    logger.addHandler(console_handler)
-    logger.addHandler(exp_info_file_handler)
-    logger.addHandler(exp_debug_file_handler)
-    logger.addHandler(exp_errors_file_handler)
+    log_queue = queue.SimpleQueue()
+
+    queue_listener = QueueListener(log_queue,
+                                   exp_info_file_handler, exp_debug_file_handler, exp_errors_file_handler,
+                                   respect_handler_level=True)
+    queue_listener.start()
+    atexit.register(queue_listener.stop)
+
+    return console_handler, QueueHandler(log_queue)
+
+
+def get_logger(name: str):
+    logger = logging.getLogger(name)
+
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(logging.DEBUG)
+
+    for handler in _get_handlers():
+        logger.addHandler(handler)
 
     return logger
@@ -1,50 +1,65 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import bisect
 from typing import AnyStr, Any, Union, Tuple, List
 
 from common.utils import get_parameter
 
 
 class Arguments(object):
+    __slots__ = ('__args', '__kwargs', '__current_index', '__arguments_count', '__indices_by_type', '__indices_cache')
 
     def __init__(self, *args, **kwargs):
         self.__args = args
         self.__kwargs = kwargs
         self.__current_index = 0
         self.__arguments_count = len(self.__args)
+        self.__indices_by_type = {}
+        self.__indices_cache = {}
+
+        for index, argument in enumerate(self.__args):
+            self.__indices_by_type.setdefault(type(argument), []).append(index)
 
     def get(self, argument_type: Union[Any, Union[Tuple[Any], List[Any]]] = None, throw_error: bool = True) -> Any:
-        if self.__current_index < self.__arguments_count:
-            result = get_parameter(
+        if self.__current_index >= self.__arguments_count:
+            return None
+
+        result = self.__args[self.__current_index]
+
+        if argument_type is not None and not isinstance(result, argument_type):
+            return get_parameter(
                 self.__args,
                 self.__current_index,
                 argument_type=argument_type,
                 throw_error=throw_error)
 
-            if result is not None:
-                self.__current_index += 1
-
-            return result
-        return None
-
-    def get_all_for(self, argument_type: Union[Any, Union[Tuple[Any], List[Any]]] = None):
-        ret = None
-        index = self.__current_index
-        while index < self.__arguments_count:
-            if argument_type is not None:
-                if isinstance(self.__args[index], argument_type):
-                    if ret is None:
-                        ret = []
-                    ret.append(self.__args[index])
-            else:
-                if ret is None:
-                    ret = []
-                ret.append(self.__args[index])
-            index += 1
-
-        if ret is not None:
-            ret = tuple(ret)
-
-        return ret
+        if result is not None:
+            self.__current_index += 1
+
+        return result
+
+    def _get_indices_for(self, argument_type: Union[Any, Tuple[Any, ...]]) -> Tuple[int, ...]:
+        indices = self.__indices_cache.get(argument_type)
+
+        if indices is None:
+            indices = tuple(sorted(index
+                                   for value_type, type_indices in self.__indices_by_type.items()
+                                   if issubclass(value_type, argument_type)
+                                   for index in type_indices))
+            self.__indices_cache[argument_type] = indices
+
+        return indices
+
+    def get_all_for(self, argument_type: Union[Any, Union[Tuple[Any], List[Any]]] = None) -> Tuple[Any, ...]:
+        if argument_type is None:
+            return self.__args[self.__current_index:]
+
+        if isinstance(argument_type, list):
+            argument_type = tuple(argument_type)
+
+        indices = self._get_indices_for(argument_type)
+        start = bisect.bisect_left(indices, self.__current_index)
+
+        return tuple(self.__args[index] for index in indices[start:])
 
     def pop(self, key: AnyStr, default: Any = None) -> Any:
         return self.__kwargs.pop(key, default=default)
@@ -0,0 +1,44 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import os
+import queue
+import threading
+
+
+def pread_into(fd: int, view: memoryview, offset: int) -> int:
+    if hasattr(os, 'preadv'):
+        return os.preadv(fd, [view], offset)
+
+    data = os.pread(fd, len(view), offset)
+    view[:len(data)] = data
+    return len(data)
+
+
+class BufferPool(object):
+
+    def __init__(self, count: int, size: int):
+        self._count = count
+        self._size = size
+        self._buffers = queue.SimpleQueue()
+        self._slots = threading.BoundedSemaphore(count)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def acquire(self, size: int = 0) -> bytearray:
+        if size > self._size:
+            return bytearray(size)
+
+        self._slots.acquire()
+
+        try:
+            return self._buffers.get_nowait()
+        except queue.Empty:
+            return bytearray(self._size)
+
+    def release(self, buffer: bytearray) -> None:
+        if len(buffer) != self._size:
+            return
+
+        self._buffers.put(buffer)
+        self._slots.release()
@@ -0,0 +1,42 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import argparse
+import logging
+import time
+from typing import Callable, Optional
+
+from common.app_logger import get_logger
+from common.convertors import time_to_string
+
+PROGRESS_VISIBLE = 'visible'
+PROGRESS_HIDDEN = 'hidden'
+
+PROGRESS_CHOICES = (PROGRESS_VISIBLE, PROGRESS_HIDDEN)
+
+logger = get_logger(__name__)
+
+
+def add_progress_argument(parser: argparse.ArgumentParser, *option_strings: str):
+    parser.add_argument(*option_strings,
+                        dest='progress_bar', type=str,
+                        choices=PROGRESS_CHOICES,
+                        default=PROGRESS_VISIBLE,
+                        help='visible or hidden progress bar (default: %(default)s)')
+
+
+def run(main_func: Callable[[], None], main_logger: Optional[logging.Logger] = None):
+    from common.utils import install_terminal_width_handler
+
+    main_logger = main_logger or logger
+    start_time = time.perf_counter()
+
+    install_terminal_width_handler()
+
+    try:
+        main_func()
+    except KeyboardInterrupt:
+        main_logger.warning('User terminate program!')
+    finally:
+        end_time = time.perf_counter()
+        main_logger.info(
+            f'Elapsed time is {time_to_string(end_time - start_time, use_milliseconds=True, human=True)}.'
+        )
@@ -2,7 +2,6 @@ import os
 import sys
 
 import psutil
-from botocore.response import StreamingBody
 
 HOME_FOLDER = os.environ.get('HOME')
 WORK_FOLDER = os.path.dirname(sys.argv[0])
@@ -10,6 +9,7 @@ TEMP_FOLDER = os.path.join(HOME_FOLDER, '.tmp/')
 LIB_FOLDER = os.path.join(HOME_FOLDER, 'Library/')
 LIB_CACHES_FOLDER = os.path.join(LIB_FOLDER, 'Caches/')
 CACHES_FOLDER = os.path.join(LIB_CACHES_FOLDER, 's3_backup/')
+HASH_CACHE_FILE = os.path.join(CACHES_FOLDER, 'hashes.cache')
 CONTAINERS_FOLDER = os.path.join(LIB_FOLDER, 'Containers/')
 DISK_O_FOLDER = os.path.join(CONTAINERS_FOLDER, 'Mail.Ru.DiskO.as/Data/Disk-O.as.mounts/')
 
@@ -26,9 +26,17 @@ SECONDS_PER_MINUTE = 60
 SECONDS_PER_HOUR = 60 * SECONDS_PER_MINUTE
 SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
 MSECONDS_PER_SECOND = 1000
+NSECONDS_PER_SECOND = 1000000000
 
 CPU_COUNT = psutil.cpu_count(logical=False)
 MAX_CONCURRENCY = (CPU_COUNT // 2) + 2
+MAX_UPLOAD_WORKERS = 32
+MAX_PART_UPLOADS = MAX_CONCURRENCY
+MAX_DELETE_OBJECTS = 1000
+MAX_WALK_WORKERS = 16
+MAX_LIST_WORKERS = 16
+LIST_DESCEND_DEPTH = 4
+WALK_PARALLEL_DEPTH = 2
 
 KBYTES = 1 << 10
 MBYTES = KBYTES << 10
@@ -43,8 +51,13 @@ memory = None
 
 FILE_SIZE_LIMIT = 32 * GBYTES
 BUFFER_SIZE = 32 * MBYTES
+PREFETCH_DEPTH = 4
 
-StreamingBody._DEFAULT_CHUNK_SIZE = 64 * KBYTES
+MULTIPART_THRESHOLD = 8 * MBYTES
+MULTIPART_CHUNKSIZE = 50 * MBYTES
+MAX_MULTIPART_PARTS = 10000
+
+STREAMING_BODY_CHUNK_SIZE = 64 * KBYTES
 
 MAX_FILE_LOG_SIZE = 2 * MBYTES
 MAX_LOG_BACKUP_COUNT = 999
@@ -56,6 +69,7 @@ ENCODER = "utf-8"
 MD5_ENCODER_NAME = "md5"
 SHA256_ENCODER_NAME = "sha256"
 SHA512_ENCODER_NAME = "sha512"
+BLAKE3_ENCODER_NAME = "blake3"
 
 # Дополнительные свойства для текта:
 BOLD = '\033[1m'  # ${BOLD}      # жирный шрифт (интенсивный цвет)
@@ -1,108 +1,109 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 import base64
+import bisect
+import functools
+import itertools
 import json
-import math
 import os
 import re
 from datetime import datetime
-from typing import Union, Type, Optional, Any
+from typing import Union, Type, Optional, Any, Callable, Pattern, Tuple
 
 from common import consts
 from common.consts import RUS_TO_LAT
 
+_TIME_RE = re.compile(r"^((\d{2}\:)?(\d{2}\:)?\d{2})$")
+_SIZE_RE = re.compile(r'((?P<number>\d+(?:[\.\,]\d+)?)\s*(?P<suffix>[kKmMgGtTpPeEzZyY]?(?:[Ii])?[Bb])(/[Ss])?)')
+_NONWORD_RE = re.compile(r"\W+")
+_TEMPLATE_RE = re.compile(r"(%\w+%)", re.IGNORECASE)
 
-def append_end_separator(path: str, sep: str = os.path.sep):
+_SEP = os.path.sep
+_ENCODER = consts.ENCODER
+_SECONDS_PER_HOUR = consts.SECONDS_PER_HOUR
+_SECONDS_PER_MINUTE = consts.SECONDS_PER_MINUTE
+_MSECONDS_PER_SECOND = consts.MSECONDS_PER_SECOND
+
+_b64encode = base64.b64encode
+_b64decode = base64.b64decode
+
+_TRUE_STRINGS = frozenset(('1', 'true', 'yes', 'y', 'ok', 'on'))
+_FALSE_STRINGS = frozenset(('0', 'false', 'no', 'n', 'nok', 'off'))
+
+_RUS_UPPER_CHARS = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+_RUS_UPPER_RE = re.compile(f'([{_RUS_UPPER_CHARS}]+)')
+_RUS_TO_LAT_TABLE = str.maketrans({
+    **RUS_TO_LAT,
+    **{char: RUS_TO_LAT[char.lower()].capitalize() for char in _RUS_UPPER_CHARS}
+})
+
+_SPEED_SUFFIXES = ('bps', 'kbps', 'mbps', 'gbps', 'tbps', 'pbps', 'ebps', 'zbps', 'ybps')
+_IEC_SUFFIXES = ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB', 'EiB', 'ZiB', 'YiB')
+_DECIMAL_SUFFIXES = ('B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB')
+_DECIMAL_POWERS = tuple(10 ** (3 * index) for index in range(len(_DECIMAL_SUFFIXES)))
+
+
+def append_end_separator(path: str, sep: str = _SEP):
     if not path.endswith(sep):
         path = path + sep
     return path
 
 
-def append_start_separator(path: str, sep: str = os.path.sep):
+def append_start_separator(path: str, sep: str = _SEP):
     if not path.startswith(sep):
         path = sep + path
     return path
 
 
-def remove_end_separator(path: str, sep: str = os.path.sep):
+def remove_end_separator(path: str, sep: str = _SEP):
     if path.endswith(sep):
         path = path[:-1]
     return path
 
 
-def remove_start_separator(path: str, sep: str = os.path.sep):
+def remove_start_separator(path: str, sep: str = _SEP):
     if path.startswith(sep):
         path = path[1:]
     return path
 
 
 def append_end_path_sep(file_path: Union[str, bytes]) -> str:
-    if len(file_path) > 0 and not file_path.endswith(os.path.sep):
-        file_path = file_path + os.path.sep
-    return file_path
-
-
-def remove_end_path_sep(file_path: Union[str, bytes]) -> str:
-    if len(file_path) > 0 and file_path.endswith(os.path.sep):
-        file_path = file_path[:-1]
+    if file_path and not file_path.endswith(_SEP):
+        file_path = file_path + _SEP
     return file_path
 
 
 def append_start_path_sep(file_path: Union[str, bytes]) -> str:
-    if len(file_path) > 0 and not file_path.startswith(os.path.sep):
-        file_path = os.path.sep + file_path
+    if file_path and not file_path.startswith(_SEP):
+        file_path = _SEP + file_path
     return file_path
 
 
-def remove_start_path_sep(file_path: Union[str, bytes]) -> str:
-    if len(file_path) > 0 and file_path.startswith(os.path.sep):
-        file_path = file_path[1:]
-    return file_path
+remove_end_path_sep = remove_end_separator
+remove_start_path_sep = remove_start_separator
 
 
+@functools.lru_cache(maxsize=1024)
 def size_to_human(size: Union[int, float], use_iec: bool = False) -> str:
     if use_iec:
-        suffixes = ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB', 'EiB', 'ZiB', 'YiB')
-        depth = 10
-        log_method = math.log2
-        degree_base = 2
+        suffixes = _IEC_SUFFIXES
+        suffix_index = min(max(int(size).bit_length() - 1, 0) // 10, len(suffixes) - 1)
+        divisor = 1 << (suffix_index * 10)
     else:
-        suffixes = ('B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB')
-        depth = 3
-        log_method = math.log10
-        degree_base = 10
-
-    degree_value = log_method(size) if size > 0 else 0
-    suffix_index = int(math.floor(degree_value / depth))
-    degree_value = suffix_index * depth
-
-    if suffix_index >= len(suffixes):
-        suffix_index = len(suffixes) - 1
-
-    divisor = math.pow(degree_base, degree_value)
+        suffixes = _DECIMAL_SUFFIXES
+        suffix_index = max(bisect.bisect_right(_DECIMAL_POWERS, size) - 1, 0)
+        divisor = _DECIMAL_POWERS[suffix_index]
 
     return f'{int(size)} {suffixes[suffix_index]}' if suffix_index == 0 \
         else f'{float(size) / divisor:.2f} {suffixes[suffix_index]}'
 
 
 def rus_to_lat(rus_str: Union[bytes, str]) -> str:
-    upper_chars = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
-    ret = ''
-
-    for char in rus_str:
-        need_upper = char in upper_chars
-        char = char.lower()
-        if char in RUS_TO_LAT:
-            char = RUS_TO_LAT[char]
+    parts = _RUS_UPPER_RE.split(rus_str)
 
-        if need_upper:
-            if len(char) > 1:
-                char = char[0].upper() + char[1:].lower()
-            else:
-                char = char.upper()
-
-        ret += char
+    for index in range(0, len(parts), 2):
+        parts[index] = parts[index].lower()
 
-    return ret
+    return ''.join(parts).translate(_RUS_TO_LAT_TABLE)
 
 
 def get_time_from_string(time_in_string: str) -> float:
@@ -148,13 +149,15 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
             if not value:
                 new_value = False
             else:
-                if value.lower().strip() in ['1', 'true', 'yes', 'y', 'ok', 'on']:
+                lower_value = value.lower()
+
+                if lower_value in _TRUE_STRINGS:
                     new_value = True
-                elif value.lower().strip() in ['0', 'false', 'no', 'n', 'nok', 'off']:
+                elif lower_value in _FALSE_STRINGS:
                     new_value = False
                 else:
                     raise ValueError(
-                        "Value {value} could not be converted to {type}".format(value=value, type=to_type.__name__))
+                        f"Value {value} could not be converted to {to_type.__name__}")
         elif isinstance(value, (int, float)):
             if int(value) == 0:
                 new_value = False
@@ -162,7 +165,7 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                 new_value = True
         else:
             raise ValueError(
-                "Value {value} could not be converted to {type}".format(value=value, type=to_type.__name__))
+                f"Value {value} could not be converted to {to_type.__name__}")
     elif to_type == int:
         try:
             if not value:
@@ -171,11 +174,9 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                 if isinstance(value, str):
                     value = value.strip()
 
-                    if re.match(r"^((\d{2}\:)?(\d{2}\:)?\d{2})$", value) is not None:
+                    if _TIME_RE.match(value) is not None:
                         new_value = int(get_time_from_string(value))
-                    elif re.match(
-                            r'((?P<number>\d+(?:[.\,]\d+)?)\s*(?P<suffix>[kKmMgGtTpPeEzZyY]?(?:[Ii])?[Bb])(/[Ss])?)',
-                            value) is not None:
+                    elif _SIZE_RE.match(value) is not None:
                         new_value = int(size_to_human(value))
                     else:
                         new_value = int(value)
@@ -185,7 +186,7 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                     new_value = int(value)
         except ValueError:
             raise ValueError(
-                "Value {value} could not be converted to {type}".format(value=value, type=to_type.__name__)) from None
+                f"Value {value} could not be converted to {to_type.__name__}") from None
     elif to_type == float:
         try:
             if not value:
@@ -194,11 +195,9 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                 if isinstance(value, str):
                     value = value.strip()
 
-                    if re.match(r"^((\d{2}\:)?(\d{2}\:)?\d{2})$", value) is not None:
+                    if _TIME_RE.match(value) is not None:
                         new_value = get_time_from_string(value)
-                    elif re.match(
-                            r'((?P<number>\d+(?:[\.\,]\d+)?)\s*(?P<suffix>[kKmMgGtTpPeEzZyY]?(?:[Ii])?[Bb])(/[Ss])?)',
-                            value) is not None:
+                    elif _SIZE_RE.match(value) is not None:
                         new_value = size_to_human(value)
                     else:
                         new_value = float(value)
@@ -208,11 +207,16 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                     new_value = float(value)
         except ValueError:
             raise ValueError(
-                "Value {value} could not be converted to {type}".format(value=value, type=to_type.__name__)) from None
+                f"Value {value} could not be converted to {to_type.__name__}") from None
     elif to_type is datetime:
         if isinstance(value, str):
             value = value.strip()
 
+            try:
+                return datetime.fromisoformat(f'{value[:-1]}+00:00' if value.endswith('Z') else value)
+            except ValueError:
+                pass
+
             date_separators: str = '.-/'
             date_value: str = value
             time_value: str = ''
@@ -277,7 +281,7 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                 except:
                     dot_pos = -1
 
-                if plus_pos != -1:
+                if dot_pos != -1:
                     has_milliseconds = True
                     time_value = time_value[:dot_pos - 1]
 
@@ -293,7 +297,7 @@ def convert_value_to_type(value: Any, to_type: Type[Any], default: Optional[Any]
                     time_format = '%S'
 
                 if has_milliseconds:
-                    time_format += '%f'
+                    time_format += '.%f'
 
                 if has_timezone:
                     time_format += '%z'
@@ -341,82 +345,90 @@ def convert_arguments_to_string(*args, **kwargs):
     Convert arguments from *args and **kwargs to string
     """
 
-    ret = []
-
-    if len(args) > 0:
-        for arg in args:
-            ret.append(convert_value_to_string(arg))
-
-    if len(kwargs) > 0:
-        for name, value in kwargs.items():
-            ret.append(f'{name} = {convert_value_to_string(value)}')
-
-    return ', '.join(ret)
+    return ', '.join(itertools.chain((convert_value_to_string(arg) for arg in args),
+                                     (f'{name} = {convert_value_to_string(value)}' for name, value in kwargs.items())))
 
 
 def convert_string_to_statement(text: Union[bytes, str]) -> str:
     text = text.lower().strip()
     text = rus_to_lat(text)
-    return re.sub(r"\W+", "_", text)
+    return _NONWORD_RE.sub("_", text)
 
 
-def convert_value_to_string(value: Any) -> str:
-    """
-    Convert any type value to string
-    """
-    result = ''
+def _list_to_string(value: list) -> str:
+    return f"[{', '.join(convert_value_to_string(item) for item in value)}]"
 
-    if value is not None:
-        if isinstance(value, list):
-            items = []
 
-            for item in value:
-                items.append(convert_value_to_string(item))
+def _tuple_to_string(value: tuple) -> str:
+    return f"({', '.join(convert_value_to_string(item) for item in value)})"
 
-            result = ', '.join(items)
-            result = f"[{result}]"
-        elif isinstance(value, tuple):
-            items = []
 
-            for item in value:
-                items.append(convert_value_to_string(item))
+def _dict_to_string(value: dict) -> str:
+    return f"{{{', '.join(f'{name} = {convert_value_to_string(item)}' for name, item in value.items())}}}"
 
-            result = ', '.join(items)
-            result = f"({result})"
-        elif isinstance(value, dict):
-            items = []
 
-            for name, item in value.items():
-                items.append(f"{name} = {convert_value_to_string(item)}")
+def _datetime_to_string(value: datetime) -> str:
+    return f"\"{value.isoformat()}\""
 
-            result = ', '.join(items)
-            result = f"{{{result}}}"
-        elif isinstance(value, datetime):
-            result = convert_value_to_string(value.isoformat())
-        elif isinstance(value, str):
-            result = f"\"{value}\""
-        else:
-            result = f'{value}'
 
-    return result
+def _str_to_string(value: str) -> str:
+    return f"\"{value}\""
+
+
+_TO_STRING_HANDLERS = {
+    list: _list_to_string,
+    tuple: _tuple_to_string,
+    dict: _dict_to_string,
+    datetime: _datetime_to_string,
+    str: _str_to_string,
+}
+
+
+def _get_to_string_handler(value_type: Type) -> Optional[Callable[[Any], str]]:
+    for base in value_type.__mro__:
+        handler = _TO_STRING_HANDLERS.get(base)
+
+        if handler is not None:
+            return handler
+
+    return None
+
+
+def convert_value_to_string(value: Any) -> str:
+    """
+    Convert any type value to string
+    """
+    if value is None:
+        return ''
+
+    value_type = type(value)
+    handler = _TO_STRING_HANDLERS.get(value_type)
+
+    if handler is None:
+        handler = _get_to_string_handler(value_type)
+
+    if handler is None:
+        return f'{value}'
+
+    return handler(value)
 
 
 def pad(text: Union[bytes, str], key: Union[bytes, str]) -> Union[bytes, str]:
-    key_len = len(key)
+    missing = (-len(text)) % len(key)
 
-    while (len(text) % key_len) != 0:
-        text += key
+    if missing == 0:
+        return text
 
-    return text
+    return text + key[:missing]
 
 
-def encode_string(value: str) -> str:
-    encoded_value = base64.b64encode(value.encode(consts.ENCODER)).decode(consts.ENCODER)
-    return encoded_value
+def encode_string(value: Union[str, bytes]) -> str:
+    data = value if isinstance(value, (bytes, bytearray, memoryview)) else value.encode(_ENCODER)
+    return _b64encode(data).decode(_ENCODER)
 
 
 def encode(value: Any) -> str:
-    if not isinstance(value, str):
+    if not isinstance(value, (str, bytes, bytearray, memoryview)):
         if isinstance(value, dict):
             value = json.dumps(value, indent=4)
         else:
@@ -424,37 +436,28 @@ def encode(value: Any) -> str:
     return encode_string(value)
 
 
-def decode_string(encoded_value: str) -> str:
-    value = base64.b64decode(encoded_value.encode(consts.ENCODER)).decode(consts.ENCODER)
-    return value
+def decode_string(encoded_value: Union[str, bytes]) -> str:
+    return _b64decode(encoded_value).decode(_ENCODER)
 
 
+@functools.lru_cache(maxsize=1024)
 def speed_to_mbps(speed: Union[int, float]) -> str:
-    suffixes = ('bps', 'kbps', 'mbps', 'gbps', 'tbps', 'pbps', 'ebps', 'zbps', 'ybps')
-
     if speed == 0:
         return '0 bps'
 
-    degree_value = math.log10(speed)
-    suffix_index = int(math.floor(degree_value / 3.0))
-
-    if suffix_index >= len(suffixes):
-        suffix_index = len(suffixes) - 1
-
-    speed_mpbs = (float(speed) / math.pow(10, 3 * suffix_index)) / 0.125
+    suffix_index = max(bisect.bisect_right(_DECIMAL_POWERS, speed) - 1, 0)
+    speed_mpbs = (float(speed) / _DECIMAL_POWERS[suffix_index]) / 0.125
 
-    return '{speed:.2f} {suffix}'.format(speed=speed_mpbs, suffix=suffixes[suffix_index])
+    return f'{speed_mpbs:.2f} {_SPEED_SUFFIXES[suffix_index]}'
 
 
+@functools.lru_cache(maxsize=1024)
 def time_to_string(time_value: Union[int, float], use_milliseconds: bool = False, human: bool = False) -> str:
-    seconds = int(time_value)
-    mseconds = int((time_value - float(seconds)) * 1000)
+    mseconds = int(time_value * _MSECONDS_PER_SECOND) % _MSECONDS_PER_SECOND
 
-    hours = seconds // consts.SECONDS_PER_HOUR
-    minutes = (seconds % consts.SECONDS_PER_HOUR) // consts.SECONDS_PER_MINUTE
-    seconds = (seconds % consts.SECONDS_PER_HOUR) % consts.SECONDS_PER_MINUTE
-    days = hours // 24
-    hours = hours % 24
+    minutes, seconds = divmod(int(time_value), _SECONDS_PER_MINUTE)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
 
     if human:
         time_parts = []
@@ -499,6 +502,11 @@ def time_to_string(time_value: Union[int, float], use_milliseconds: bool = False
     return ret
 
 
+@functools.lru_cache(maxsize=32)
+def _get_template_values_re(values: Tuple[str, ...]) -> Pattern:
+    return re.compile('|'.join(map(re.escape, sorted(values, key=len, reverse=True))))
+
+
 def make_template_from_string(*args, **kwargs) -> str:
     ret = ''.join(args)
 
@@ -513,13 +521,27 @@ def make_template_from_string(*args, **kwargs) -> str:
     for name, value in kwargs.items():
         template_values[name] = value
 
+    names = {}
+
     for name, value in template_values.items():
-        if value in ret:
-            index = ret.index(value)
-            length = len(value)
-            ret = ret[:index] + '%' + name + '%' + ret[index + length:]
+        if value:
+            names.setdefault(value, name)
 
-    return ret
+    if not names:
+        return ret
+
+    replaced = set()
+
+    def _replace(match) -> str:
+        value = match.group(0)
+
+        if value in replaced:
+            return value
+
+        replaced.add(value)
+        return f'%{names[value]}%'
+
+    return _get_template_values_re(tuple(names)).sub(_replace, ret)
 
 
 def make_string_from_template(*args, **kwargs) -> str:
@@ -530,28 +552,29 @@ def make_string_from_template(*args, **kwargs) -> str:
         'HOME': remove_end_path_sep(consts.HOME_FOLDER),
         'WORK': remove_end_path_sep(consts.WORK_FOLDER),
         'TEMP': remove_end_path_sep(consts.TEMP_FOLDER),
-        'CURRENT_DATE': datetime.now().strftime('%Y%m%d'),
-        'CURRENT_TIME': datetime.now().strftime('%H%M%S'),
     }
 
+    if '%CURRENT_' in ret.upper():
+        now = datetime.now()
+        template_values['CURRENT_DATE'] = f'{now:%Y%m%d}'
+        template_values['CURRENT_TIME'] = f'{now:%H%M%S}'
+
     for name, value in kwargs.items():
         name = '%' + name.upper() + '%'
         template_values[name] = value
 
-    ret = re.sub(r"(%\w+%)", lambda m: template_values.get(m.group(0).upper()), ret, flags=re.IGNORECASE)
+    ret = _TEMPLATE_RE.sub(lambda m: template_values.get(m.group(0).upper()), ret)
 
     return ret
 
 
+@functools.lru_cache(maxsize=1024)
 def mstime_to_string(time_value: int, use_milliseconds: bool = False) -> str:
     ret = ''
 
-    seconds = time_value // consts.MSECONDS_PER_SECOND
-    time_value = time_value % consts.MSECONDS_PER_SECOND
-
-    hours = seconds // consts.SECONDS_PER_HOUR
-    minutes = (seconds % consts.SECONDS_PER_HOUR) // consts.SECONDS_PER_MINUTE
-    seconds = (seconds % consts.SECONDS_PER_HOUR) % consts.SECONDS_PER_MINUTE
+    seconds, time_value = divmod(time_value, _MSECONDS_PER_SECOND)
+    minutes, seconds = divmod(seconds, _SECONDS_PER_MINUTE)
+    hours, minutes = divmod(minutes, 60)
 
     if hours > 0:
         ret = f'{hours:02d}:{minutes:02d}:{seconds:02d}.{time_value:03d}'
@@ -564,13 +587,12 @@ def mstime_to_string(time_value: int, use_milliseconds: bool = False) -> str:
     return ret
 
 
+@functools.lru_cache(maxsize=1024)
 def time_to_short_string(time_value: Union[int, float]) -> str:
     ret = ''
 
-    seconds = int(time_value)
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    seconds = (seconds % 3600) % 60
+    minutes, seconds = divmod(int(time_value), 60)
+    hours, minutes = divmod(minutes, 60)
 
     if hours > 0:
         if hours == 1:
@@ -617,31 +639,32 @@ def time_to_short_string(time_value: Union[int, float]) -> str:
     return ret
 
 
-def get_string_case(value: Union[int, float], string_case_1: Union[str, bytes], string_case_2: Union[str, bytes],
-                    string_case_3: Optional[Union[str, bytes]] = None) -> str:
-    if string_case_3 is None:
-        string_case_3 = string_case_2
+def _get_string_case_index(value: int) -> int:
+    if value > 19:
+        value = value % 10
 
-    frac_part = 0.0
+    if value == 0 or value > 4:
+        return 2
+    elif value > 1:
+        return 1
 
-    value = abs(value)
+    return 0
 
-    if isinstance(value, float):
-        frac_part = value - int(value)
-        value = int(value)
 
-    if value > 99:
-        value = value % 100
+_STRING_CASE_INDEX = bytes(_get_string_case_index(value) for value in range(100))
 
-    if value > 19:
-        value = value % 10
 
-    if value == 0 or value > 4:
-        return string_case_3
-    elif 1 < value < 5:
-        return string_case_2
+@functools.lru_cache(maxsize=1024)
+def get_string_case(value: Union[int, float], string_case_1: Union[str, bytes], string_case_2: Union[str, bytes],
+                    string_case_3: Optional[Union[str, bytes]] = None) -> str:
+    if string_case_3 is None:
+        string_case_3 = string_case_2
+
+    value = abs(value)
+    int_value = int(value)
+    index = _STRING_CASE_INDEX[int_value % 100]
 
-    if frac_part > 0.00:
-        return string_case_2
+    if index == 0 and value != int_value:
+        index = 1
 
-    return string_case_1
+    return (string_case_1, string_case_2, string_case_3)[index]
@@ -1,5 +1,6 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
+import contextlib
 import datetime
 import hashlib
 import os
@@ -14,7 +15,6 @@ from common import consts
 from common import utils
 from common.app_logger import get_logger
 from common.arguments import Arguments
-from common.closer import Closer
 from common.convertors import convert_value_to_type, convert_value_to_string, get_string_case
 from common.metasingleton import MetaSingleton
 from common.progress_bar import ProgressBar
@@ -775,7 +775,7 @@ class DBManager(metaclass=MetaSingleton):
         Parameters maybe None or any type.
         The return all the records.
         """
-        with Closer(self.prepare_query(statement, parameters)) as cursor:
+        with contextlib.closing(self.prepare_query(statement, parameters)) as cursor:
             for row in cursor.fetchall():
                 record = DBManager.convert_row_values(row)
                 yield record
@@ -792,7 +792,7 @@ class DBManager(metaclass=MetaSingleton):
         """
         record = None
 
-        with Closer(self.prepare_query(statement, parameters)) as cursor:
+        with contextlib.closing(self.prepare_query(statement, parameters)) as cursor:
             row = cursor.fetchone()
             record = DBManager.convert_row_values(row)
 
@@ -807,7 +807,7 @@ class DBManager(metaclass=MetaSingleton):
         """
 
         try:
-            with Closer(self.prepare_query(statement, parameters)) as cursor:
+            with contextlib.closing(self.prepare_query(statement, parameters)) as cursor:
                 self.commit()
 
                 updated_rows = cursor.rowcount
@@ -831,7 +831,7 @@ class DBManager(metaclass=MetaSingleton):
         Run the SQL script to create tables/indexes and other things.
         """
         try:
-            with Closer(self.create_cursor()) as cursor:
+            with contextlib.closing(self.create_cursor()) as cursor:
                 cursor.executescript(script)
             return True
         except Exception as ex:
@@ -929,7 +929,7 @@ def create_database(name: str) -> DBManager:
 #     try:
 #         database_class = get_database_manager_class()
 #
-#         with Closer(database_class(name=name)) as database:
+#         with contextlib.closing(database_class(name=name)) as database:
 #             parameters = tuple(args) if len(args) > 0 else None
 #             return database.execute_update(builder.make_insert_statement(), parameters)
 #     except Error as error:
@@ -942,7 +942,7 @@ def create_database(name: str) -> DBManager:
 #     try:
 #         database_class = get_database_manager_class()
 #
-#         with Closer(database_class(name=name)) as database:
+#         with contextlib.closing(database_class(name=name)) as database:
 #             parameters = tuple(args) if len(args) > 0 else None
 #             if parameters is not None:
 #                 return database.execute_update(builder.make_update_statement(), parameters)
@@ -958,7 +958,7 @@ def create_database(name: str) -> DBManager:
 #     try:
 #         database_class = get_database_manager_class()
 #
-#         with Closer(database_class(name=name)) as database:
+#         with contextlib.closing(database_class(name=name)) as database:
 #             parameters = tuple(args) if len(args) > 0 else None
 #             return database.execute_update(builder.make_delete_statement(), parameters)
 #     except Error as error:
@@ -971,7 +971,7 @@ def create_database(name: str) -> DBManager:
 #     try:
 #         database_class = get_database_manager_class()
 #
-#         with Closer(database_class(name=name)) as database:
+#         with contextlib.closing(database_class(name=name)) as database:
 #             parameters = tuple(args) if len(args) > 0 else None
 #             for record in database.execute(builder.make_select_statement(), parameters):
 #                 yield record
@@ -985,7 +985,7 @@ def create_database(name: str) -> DBManager:
 #     try:
 #         database_class = get_database_manager_class()
 #
-#         with Closer(database_class(name=name)) as database:
+#         with contextlib.closing(database_class(name=name)) as database:
 #             parameters = tuple(args) if len(args) > 0 else None
 #             return database.execute_once(builder.make_select_statement(), parameters)
 #     except Error as error:
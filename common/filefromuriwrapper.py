@@ -1,4 +1,21 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import functools
+from typing import Any, Callable, Optional, Union
+
+import requests
+from botocore.response import StreamingBody
+from requests import Session
+from urllib3.response import HTTPResponse
+
+from common.app_logger import get_logger
+from common.filenotsupportederror import FileNotSupportedError
+from common.filewrapper import DEFAULT_CHUCK_SIZE, _get_raw_data
+from common.prefetcher import ChunkPrefetcher
+from common.urn import Urn
+from common.utils import is_closed, close, next_chunk_iobase, next_chunk_bytes
+from s3._base._object import S3Object
+
+logger = get_logger(__name__)
 
 
 class FileFromURLWrapper(object):
@@ -9,7 +26,8 @@ class FileFromURLWrapper(object):
                  session: Session = None,
                  response: requests.Response = None,
                  chuck_size: int = None,
-                 callback: Callable[[Any], Any] = None):
+                 callback: Callable[[Any], Any] = None,
+                 prefetch_depth: int = 0):
 
         if not file_url and not response and not session:
             raise AttributeError("You've to pass one of three parameters")
@@ -17,43 +35,87 @@ class FileFromURLWrapper(object):
         self.content_length = None
         self.bytes_read = 0
 
-        if not requests:
+        if response is None:
             self.session = session or requests.Session()
-            requested_file = response or self._request_for_file(file_url)
+            response = self._request_for_file(file_url)
 
-            self.response = requested_file
-            self.raw_data = _get_raw_data(requested_file)
-        else:
-            self.response = response
-            self.raw_data = _get_raw_data(response)
+        self.response = response
+        self.raw_data = _get_raw_data(response)
 
         self.total_size = self.len
         self.left_bytes = self.total_size
         self.chunk_size = min(self.total_size, chuck_size if chuck_size else DEFAULT_CHUCK_SIZE)
-        self.chunk = self._next_chunk()
+        self._buffer = bytearray(self.chunk_size)
+        self._view = memoryview(self._buffer)
+        self._chunk = None
+        self._chunk_len = 0
+        self._chunk_pos = 0
+        self._stream = None
+        self._prefetcher = None
+        self._source_pos = 0
+
+        if prefetch_depth > 1 and self.chunk_size > 0 and hasattr(self.raw_data, 'readinto'):
+            self._prefetcher = ChunkPrefetcher(self.raw_data.readinto, self.chunk_size, prefetch_depth)
+            self._read_chunk = self._prefetcher.read
+        elif isinstance(self.raw_data, HTTPResponse):
+            self._stream = self.raw_data.stream(self.chunk_size, decode_content=False)
+            self._read_chunk = self._read_stream_chunk
+        elif isinstance(self.raw_data, S3Object):
+            self._read_chunk = self._read_object_chunk
+        elif hasattr(self.raw_data, 'readinto'):
+            self._read_chunk = self._read_into_chunk
+        elif hasattr(self.raw_data, 'read'):
+            self._read_chunk = functools.partial(next_chunk_iobase, self.raw_data, self.chunk_size)
+        else:
+            self._read_chunk = self._read_bytes_chunk
+
+        self._next_chunk()
 
         self.set_callback(callback)
 
-    def _next_chunk(self):
+    def _read_stream_chunk(self) -> Optional[memoryview]:
+        buffer = next(self._stream, None)
+        return memoryview(buffer) if buffer else None
+
+    def _read_object_chunk(self) -> Optional[memoryview]:
+        buffer = self.raw_data.next()
+        return memoryview(buffer) if buffer else None
+
+    def _read_into_chunk(self) -> Optional[memoryview]:
+        read_bytes = self.raw_data.readinto(self._buffer)
+        return self._view[:read_bytes] if read_bytes else None
+
+    def _read_bytes_chunk(self) -> Optional[memoryview]:
+        chunk = next_chunk_bytes(self.raw_data, self._source_pos, self.chunk_size)
+        if chunk is not None:
+            self._source_pos += len(chunk)
+        return chunk
+
+    def _next_chunk(self) -> int:
+        self._chunk = None
+        self._chunk_len = 0
+        self._chunk_pos = 0
 
         try:
-            if isinstance(self.raw_data, S3Object):
-                return FileWrapperBytesIO(buffer=self.raw_data.next())
-            else:
-                return FileWrapperBytesIO(buffer=next_chunk(self.raw_data, chunk_size=self.chunk_size))
+            self._chunk = self._read_chunk()
         except Exception as ex:
-            logging.error(ex, stack_info=False)
+            logger.error('Chunk read failed: %s', ex)
 
-        return None
+        if self._chunk is not None:
+            self._chunk_len = len(self._chunk)
+
+        return self._chunk_len
 
     def close(self):
-        if not is_closed(self.chunk):
-            close(self.chunk)
-            self.chunk = None
+        self._chunk = None
+        self._stream = None
+
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
 
         if not is_closed(self.raw_data):
-            close(self.chunk)
-            self.chunk = None
+            close(self.raw_data)
 
         if not is_closed(self.response):
             close(self.response)
@@ -98,42 +160,34 @@ class FileFromURLWrapper(object):
 
     def _request_for_file(self, file_url):
         """Make call for file under provided URL."""
-        response = self.session.get(file_url, stream=True)
+        self.response = self.session.get(file_url, stream=True)
         _ = self.len
-        return response
+        return self.response
 
     def read(self, chunk_size: int = -1) -> Optional[Union[bytes, memoryview]]:
         """Read file in chunks."""
-        if self.chunk is None:
-            self.chunk = self._next_chunk()
-            if self.chunk is None:
-                return None
-
-        if self.chunk.len == 0:
-            self.chunk = self._next_chunk()
-            read_size = self.chunk.len if self.chunk else 0
-            if read_size == 0:
+        if self._chunk_pos >= self._chunk_len:
+            if not self._next_chunk():
                 return None
 
         if chunk_size == -1:
             chunk_size = 8192
 
         try:
-            # chunk_size = min(chunk_size, self.chunk.len)
-            chunk_size = min(max(chunk_size, DEFAULT_CHUCK_SIZE), self.chunk.len)
+            chunk_size = min(max(chunk_size, DEFAULT_CHUCK_SIZE), self._chunk_len - self._chunk_pos)
 
-            chunk = read_data_from(self.chunk, length=chunk_size)
+            chunk = self._chunk[self._chunk_pos:self._chunk_pos + chunk_size]
+            self._chunk_pos += chunk_size
 
-            read_size = total_len(chunk) if chunk else 0
-            self.left_bytes -= read_size
-            self.bytes_read += read_size
+            self.left_bytes -= chunk_size
+            self.bytes_read += chunk_size
 
             if self.callback:
                 self.callback(self)
 
             return chunk
         except Exception as ex:
-            logging.error(ex, stack_info=False)
+            logger.error('Chunk read failed: %s', ex)
 
         return None
 
@@ -143,7 +197,8 @@ class FileFromURLWrapper(object):
     @staticmethod
     def create(body: Union[StreamingBody, HTTPResponse],
                chuck_size: int = None,
-               callback: Callable[[Any], Any] = None):
+               callback: Callable[[Any], Any] = None,
+               prefetch_depth: int = 0):
         response = None
         if body is not None:
             if hasattr(body, 'raw_stream'):
@@ -154,6 +209,7 @@ class FileFromURLWrapper(object):
         if response is None:
             raise ValueError(f'The body incorrect.')
 
-        file_wrapper = FileFromURLWrapper(response=response, chuck_size=chuck_size, callback=callback)
+        file_wrapper = FileFromURLWrapper(response=response, chuck_size=chuck_size, callback=callback,
+                                          prefetch_depth=prefetch_depth)
 
         return file_wrapper
@@ -1,16 +1,58 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 import errno
+import functools
 import hashlib
 import json
+import mmap
 import os
-from typing import Union, AnyStr, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, AnyStr, Optional, Any, Iterator, Callable
 
 from common import consts, filewrapper
+from common.bufferpool import BufferPool, pread_into
 from common.convertors import encode_string
 from common.filewrapper import FileWrapper
 from common.utils import print_progress_bar, get_terminal_width
 from s3._base._object import S3Object
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+def _make_hash_factory(hash_name: str) -> Callable[[], Any]:
+    constructor = getattr(hashlib, hash_name, None) or functools.partial(hashlib.new, hash_name)
+
+    try:
+        constructor(usedforsecurity=False)
+    except TypeError:
+        return constructor
+
+    return functools.partial(constructor, usedforsecurity=False)
+
+
+_HASH_FACTORIES = {hash_name: _make_hash_factory(hash_name) for hash_name in hashlib.algorithms_guaranteed}
+
+_HAS_FILE_DIGEST = hasattr(hashlib, 'file_digest')
+
+if blake3 is not None:
+    _HASH_FACTORIES[consts.BLAKE3_ENCODER_NAME] = blake3.blake3
+
+
+def _new_hash(hash_name: str) -> Any:
+    factory = _HASH_FACTORIES.get(hash_name)
+    return factory() if factory is not None else hashlib.new(hash_name)
+
+
+def _copy_hash_factory(prototype: Any) -> Callable[..., Any]:
+    def factory(data: Union[bytes, memoryview] = b'') -> Any:
+        o_hash = prototype.copy()
+        o_hash.update(data)
+        return o_hash
+
+    return factory
+
 
 def _get_file_name(o) -> Optional[str]:
     if o is not None:
@@ -32,34 +74,135 @@ def _calc_hash(file_object,
                as_base64: bool = False,
                chuck_size: int = consts.BUFFER_SIZE,
                show_progress: bool = True) -> str:
-    if not hasattr(file_object, 'read'):
-        raise Exception(f"The file object <{type(file_object).__name__}> is unreadable.")
-
-    if not filewrapper.is_callable(file_object.read):
-        raise Exception(f"The file object <{type(file_object).__name__}> is unreadable.")
-
-    if not hasattr(file_object, 'close'):
-        raise Exception(f"The file object <{type(file_object).__name__}> doesn't close.")
-
-    if not filewrapper.is_callable(file_object.close):
-        raise Exception(f"The file object <{type(file_object).__name__}> doesn't close.")
-
-    o_hash = hashlib.new(name=hash_name)
+    o_hash = _new_hash(hash_name)
+    update = o_hash.update
     converted_bytes = 0
+    left_bytes = file_object.left_bytes
+    prefix = f'Calculate hash {hash_name.upper()}'
 
-    fname = _get_file_name(file_object)
     chuck_size = min(length, chuck_size)
+    readinto = getattr(file_object, 'readinto', None)
 
-    while file_object.left_bytes > 0:
-        buffer = file_object.read(chuck_size)
+    if readinto is not None:
+        view = memoryview(bytearray(chuck_size))
+        read_chunk = lambda: view[:readinto(view)]
+    else:
+        read_chunk = functools.partial(file_object.read, chuck_size)
+
+    while left_bytes > 0:
+        buffer = read_chunk()
 
         if not buffer:
-            raise IOError(errno.EIO, os.strerror(errno.EIO), fname)
+            raise IOError(errno.EIO, os.strerror(errno.EIO), _get_file_name(file_object))
 
-        o_hash.update(buffer)
+        update(buffer)
+        left_bytes -= len(buffer)
 
         if show_progress:
             converted_bytes += len(buffer)
+            print_progress_bar(iteration=converted_bytes,
+                               total=length,
+                               prefix=prefix,
+                               length=get_terminal_width())
+
+    result = o_hash.hexdigest()
+    return encode_string(result) if as_base64 else result
+
+
+class _ProgressReader(object):
+    def __init__(self, fd, total: int, prefix: str):
+        self._readinto = fd.readinto
+        self._total = total
+        self._prefix = prefix
+        self._read_bytes = 0
+
+    @staticmethod
+    def readable() -> bool:
+        return True
+
+    def readinto(self, buffer) -> Optional[int]:
+        read_bytes = self._readinto(buffer)
+
+        if read_bytes:
+            self._read_bytes += read_bytes
+            print_progress_bar(iteration=self._read_bytes,
+                               total=self._total,
+                               prefix=self._prefix,
+                               length=get_terminal_width())
+
+        return read_bytes
+
+
+def _advise_sequential(fd: int) -> None:
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+
+def _map_file(file_name: str) -> Optional[mmap.mmap]:
+    try:
+        fd = os.open(file_name, os.O_RDONLY)
+    except OSError:
+        return None
+
+    try:
+        _advise_sequential(fd)
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+
+    return mm
+
+
+def _iter_file_chunks(file_name: str, chuck_size: int) -> Iterator[Union[bytes, memoryview]]:
+    mm = _map_file(file_name)
+
+    if mm is None:
+        with open(file_name, 'rb') as f:
+            yield from iter(lambda: f.read(chuck_size), b'')
+        return
+
+    with mm, memoryview(mm) as view:
+        for offset in range(0, len(view), chuck_size):
+            with view[offset:offset + chuck_size] as chunk:
+                yield chunk
+
+
+def _calc_mapped_file_hash(file_name: str,
+                           hash_name: AnyStr = consts.MD5_ENCODER_NAME,
+                           as_base64: bool = False,
+                           chuck_size: int = consts.BUFFER_SIZE,
+                           show_progress: bool = True) -> str:
+    if hash_name == consts.BLAKE3_ENCODER_NAME and blake3 is not None and hasattr(blake3.blake3, 'update_mmap'):
+        result = blake3.blake3(max_threads=blake3.blake3.AUTO).update_mmap(file_name).hexdigest()
+        return encode_string(result) if as_base64 else result
+
+    length = get_file_size(file_name) if show_progress else 0
+
+    if _HAS_FILE_DIGEST:
+        with open(file_name, 'rb', buffering=0) as f:
+            _advise_sequential(f.fileno())
+            reader = _ProgressReader(f, total=length, prefix=f'Calculate hash {hash_name.upper()}') \
+                if show_progress else f
+            result = hashlib.file_digest(reader, _HASH_FACTORIES.get(hash_name, hash_name)).hexdigest()
+        return encode_string(result) if as_base64 else result
+
+    o_hash = _new_hash(hash_name)
+    converted_bytes = 0
+
+    for chunk in _iter_file_chunks(file_name, chuck_size):
+        o_hash.update(chunk)
+
+        if show_progress:
+            converted_bytes += len(chunk)
             print_progress_bar(iteration=converted_bytes,
                                total=length,
                                prefix=f'Calculate hash {hash_name.upper()}',
@@ -74,19 +217,26 @@ def _calc_file_hash(file_object: Union[str, bytes, int],
                     as_base64: bool = False,
                     chuck_size: int = consts.BUFFER_SIZE,
                     show_progress: bool = True) -> str:
+    if isinstance(file_object, str) and os.path.isfile(file_object):
+        return _calc_mapped_file_hash(file_object, hash_name=hash_name, as_base64=as_base64,
+                                      chuck_size=chuck_size, show_progress=show_progress)
+
     file_wrapper = FileWrapper.create(file=file_object, mode="rb", chuck_size=consts.BUFFER_SIZE,
-                                      encoding=consts.ENCODER)
+                                      encoding=consts.ENCODER, prefetch_depth=consts.PREFETCH_DEPTH)
 
-    return _calc_hash(file_object=file_wrapper, length=get_file_size(file_wrapper), hash_name=hash_name,
-                      as_base64=as_base64, chuck_size=chuck_size,
-                      show_progress=show_progress)
+    try:
+        return _calc_hash(file_object=file_wrapper, length=get_file_size(file_wrapper), hash_name=hash_name,
+                          as_base64=as_base64, chuck_size=chuck_size,
+                          show_progress=show_progress)
+    finally:
+        file_wrapper.close()
 
 
 def get_file_size(file_name: Any) -> int:
     if isinstance(file_name, str):
         try:
-            return os.stat(file_name).st_size
-        except Exception:
+            return os.path.getsize(file_name)
+        except OSError:
             return 0
     else:
         return filewrapper.total_len(file_name)
@@ -116,38 +266,102 @@ def calc_file_hash(file_object: Union[str, bytes, int, S3Object],
         )
 
 
-def get_file_etag(file_name: Union[str, bytes, int], show_progress: bool = True) -> str:
+def get_etag_parts_count(etag: Optional[str]) -> int:
+    if etag:
+        _, sep, parts_count = etag.strip('"').rpartition('-')
+        if sep and parts_count.isdigit():
+            return int(parts_count)
+    return 0
+
+
+def get_multipart_part_size(file_size: int) -> int:
+    part_size = -(-file_size // consts.MAX_MULTIPART_PARTS)
+    return max(consts.MULTIPART_CHUNKSIZE, -(-part_size // consts.MBYTES) * consts.MBYTES)
+
+
+def get_etag_part_size(file_size: int, num_of_parts: int) -> int:
+    if num_of_parts <= 1:
+        return max(file_size, consts.MULTIPART_CHUNKSIZE)
+
+    for part_size in (get_multipart_part_size(file_size), 8 * consts.MBYTES, 15 * consts.MBYTES):
+        if (file_size + part_size - 1) // part_size == num_of_parts:
+            return part_size
+
+    part_size = -(-file_size // num_of_parts)
+    return -(-part_size // consts.MBYTES) * consts.MBYTES
+
+
+def _get_part_workers(file_size: int, part_size: int) -> int:
+    return max(1, min(consts.CPU_COUNT, (file_size + part_size - 1) // part_size))
+
+
+def _hash_file_part(fd: int, offset: int, size: int, pool: BufferPool, hash_factory: Callable[[Any], Any]) -> bytes:
+    buffer = pool.acquire(size)
+
+    try:
+        with memoryview(buffer) as view:
+            read_bytes = pread_into(fd, view[:size], offset)
+            return hash_factory(view[:read_bytes]).digest()
+    finally:
+        pool.release(buffer)
+
+
+def _iter_read_part_digests(file_name: str, part_size: int, hash_factory: Callable[[Any], Any]) -> Iterator[bytes]:
+    fd = os.open(file_name, os.O_RDONLY)
+
+    try:
+        _advise_sequential(fd)
+        file_size = os.fstat(fd).st_size
+        max_workers = _get_part_workers(file_size, part_size)
+        pool = BufferPool(max_workers, part_size)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(lambda offset: _hash_file_part(fd, offset, part_size, pool, hash_factory),
+                                    range(0, file_size, part_size))
+    finally:
+        os.close(fd)
+
+
+def _iter_part_digests(file_name: str, part_size: int, hash_factory: Callable[[Any], Any]) -> Iterator[bytes]:
+    mm = _map_file(file_name)
+
+    if mm is None:
+        yield from _iter_read_part_digests(file_name, part_size, hash_factory)
+        return
+
+    with mm, memoryview(mm) as view, \
+            ThreadPoolExecutor(max_workers=_get_part_workers(len(view), part_size)) as executor:
+        yield from executor.map(lambda offset: hash_factory(view[offset:offset + part_size]).digest(),
+                                range(0, len(view), part_size))
+
+
+def get_file_etag(file_name: Union[str, bytes, int],
+                  show_progress: bool = True,
+                  part_size: Optional[int] = None) -> str:
     if isinstance(file_name, bytes):
         file_name = file_name.decode(json.detect_encoding(file_name))
 
     file_size = get_file_size(file_name=file_name)
-    part_size = min(file_size, consts.BUFFER_SIZE)
 
-    if file_size > consts.FILE_SIZE_LIMIT:
-        num_of_parts = (file_size // consts.BUFFER_SIZE)
-        if (file_size % consts.BUFFER_SIZE) != 0:
-            num_of_parts += 1
-    else:
-        num_of_parts = 1
+    if part_size is None:
+        if file_size <= consts.MULTIPART_THRESHOLD:
+            return calc_file_hash(file_object=file_name, show_progress=show_progress)
+        part_size = consts.MULTIPART_CHUNKSIZE
 
-    # md5_hash = hashlib.new('md5')
+    md5 = _copy_hash_factory(_new_hash(consts.MD5_ENCODER_NAME))
     md5_digests = []
 
     if file_size > 0:
         converted_bytes = 0
-        with open(file_name, 'rb') as f:
-            for chunk in iter(lambda: f.read(part_size), b''):
-                if show_progress:
-                    converted_bytes += len(chunk)
-                    print_progress_bar(iteration=converted_bytes,
-                                       total=file_size,
-                                       prefix=f'Calculate MD5 etag')
-
-                md5_digests.append(hashlib.md5(chunk).digest())
+        for digest in _iter_part_digests(file_name, part_size, md5):
+            if show_progress:
+                converted_bytes = min(converted_bytes + part_size, file_size)
+                print_progress_bar(iteration=converted_bytes,
+                                   total=file_size,
+                                   prefix=f'Calculate MD5 etag')
 
-    etag = hashlib.md5(b''.join(md5_digests)).hexdigest()
+            md5_digests.append(digest)
 
-    if num_of_parts > 1:
-        etag = etag + '-' + str(num_of_parts)
+    etag = md5(b''.join(md5_digests)).hexdigest()
 
-    return etag
+    return f'{etag}-{len(md5_digests)}'
@@ -2,10 +2,9 @@
 
 import contextlib
 import io
-import logging
 import os
 from io import BytesIO
-from typing import Any, AnyStr, Callable, Text, Union, Optional, Tuple, Dict, List
+from typing import Any, AnyStr, Callable, Text, Union, Optional, Tuple, Dict, List, Iterator
 
 import requests
 from botocore.response import StreamingBody
@@ -13,12 +12,15 @@ from requests import Session
 from urllib3.response import HTTPResponse
 
 from common import consts
+from common.app_logger import get_logger
 from common.consts import ENCODER
 from common.filewrapperbytesio import FileWrapperBytesIO
+from common.prefetcher import ChunkPrefetcher
 from common.urn import Urn
-from common.utils import is_callable, calling_method, total_len, is_closed, close, next_chunk, read_data_from
+from common.utils import is_callable, calling_method, total_len, is_closed, close, encode_with
 from s3._base._object import S3Object
 
+logger = get_logger(__name__)
 
 DEFAULT_CHUCK_SIZE = consts.KBYTES * 64
 DEFAULT_ENCODING = consts.ENCODER
@@ -41,7 +43,8 @@ class FileWrapper(object):
 
     def __init__(self, file: Union[io.TextIOBase, io.BufferedIOBase, io.FileIO], chunk_size: int = DEFAULT_CHUCK_SIZE,
                  encoding: AnyStr = DEFAULT_ENCODING,
-                 callback: Optional[FileWrapperCallbackType] = None):
+                 callback: Optional[FileWrapperCallbackType] = None,
+                 prefetch_depth: int = 0):
         self.fd = file
         self.encoding = encoding
         self.total_size = total_len(self.fd)
@@ -49,67 +52,169 @@ class FileWrapper(object):
         self.chunk_size = min(self.total_size, chunk_size)
         self.callback = callback
         self.bytes_read = 0
-        self.chunk = self._next_chunk()
+        self._buffer = bytearray(self.chunk_size)
+        self._view = memoryview(self._buffer)
+        self._chunk = None
+        self._chunk_len = 0
+        self._chunk_pos = 0
+        self._readinto = getattr(self.fd, 'readinto', None)
+        self._prefetcher = None
+
+        if self._readinto is None:
+            self._read_chunk = self.fd.read
+            self._next_chunk()
+        elif prefetch_depth > 1 and self.chunk_size > 0:
+            self._prefetcher = ChunkPrefetcher(self._readinto, self.chunk_size, prefetch_depth)
 
     def close(self):
-        if not is_closed(self.chunk):
-            close(self.chunk)
-            self.chunk = None
+        self._chunk = None
+
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+        if self._readinto is not None and self.bytes_read > 0 and hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(self.fd.fileno(), 0, self.bytes_read, os.POSIX_FADV_DONTNEED)
+            except (OSError, ValueError, io.UnsupportedOperation):
+                pass
 
         if not is_closed(self.fd):
             close(self.fd)
             self.fd = None
 
-    def _next_chunk(self) -> Optional[FileWrapperBytesIO]:
+    def _next_chunk(self) -> int:
+        self._chunk = None
+        self._chunk_len = 0
+        self._chunk_pos = 0
+
         try:
-            return FileWrapperBytesIO(buffer=next_chunk(buffer=self.fd, chunk_size=self.chunk_size),
-                                      encoding=self.encoding)
+            buffer = self._read_chunk(self.chunk_size)
+
+            if buffer:
+                self._chunk = memoryview(encode_with(buffer, encoding=self.encoding))
         except Exception as ex:
-            logging.error(ex, stack_info=True)
+            logger.error('Chunk read failed: %s', ex)
+
+        if self._chunk is not None:
+            self._chunk_len = len(self._chunk)
 
-        return None
+        return self._chunk_len
 
     @property
     def len(self):
         return total_len(self.fd)
 
-    def read(self, length: int = -1) -> Optional[Union[bytes, memoryview]]:
+    def _read_into(self, length: int) -> Optional[memoryview]:
+        try:
+            if self._prefetcher is not None:
+                if self._chunk_pos < self._chunk_len:
+                    buffer = self._chunk[self._chunk_pos:self._chunk_len]
+                    self._chunk_pos = self._chunk_len
+                else:
+                    buffer = self._prefetcher.read()
+            else:
+                read_bytes = self._readinto(self._view[:min(max(length, DEFAULT_CHUCK_SIZE), self.chunk_size)])
+                buffer = self._view[:read_bytes] if read_bytes else None
+        except Exception as ex:
+            logger.error('Chunk read failed: %s', ex)
+            return None
+
+        if buffer is None:
+            return None
+
+        self.left_bytes -= len(buffer)
+        self.bytes_read += len(buffer)
+
+        if self.callback:
+            self.callback(self)
+
+        return buffer
+
+    def read(self, length: int = -1) -> Optional[bytes]:
+        if self._readinto is not None:
+            buffer = self._read_into(length)
+            return bytes(buffer) if buffer is not None else None
+
         buffer = None
 
         try:
-            if not self.chunk.len:
-                self.chunk = self._next_chunk()
-
-                if not self.chunk:
+            if self._chunk_pos >= self._chunk_len:
+                if not self._next_chunk():
                     return None
 
-            if self.chunk.len:
-                # length = min(max(length, self.chunk_size), self.chunk.len)
-                length = min(max(length, DEFAULT_CHUCK_SIZE), self.chunk.len)
-                buffer = read_data_from(self.chunk, length=length)
-                read_bytes = total_len(buffer) if buffer else 0
+            length = min(max(length, DEFAULT_CHUCK_SIZE), self._chunk_len - self._chunk_pos)
+            buffer = bytes(self._chunk[self._chunk_pos:self._chunk_pos + length])
+            self._chunk_pos += length
 
-                self.left_bytes -= read_bytes
-                self.bytes_read += read_bytes
+            self.left_bytes -= length
+            self.bytes_read += length
 
             if self.callback:
                 self.callback(self)
 
         except Exception as ex:
-            logging.error(ex, stack_info=True)
+            logger.error('Chunk read failed: %s', ex)
             return None
 
         return buffer
 
+    def _fill_chunk(self) -> int:
+        if self._prefetcher is None:
+            return self._next_chunk()
+
+        self._chunk = self._prefetcher.read()
+        self._chunk_len = len(self._chunk) if self._chunk is not None else 0
+        self._chunk_pos = 0
+
+        return self._chunk_len
+
+    def readinto(self, buffer: Union[bytearray, memoryview]) -> int:
+        view = memoryview(buffer).cast('B')
+
+        try:
+            if self._readinto is not None and self._prefetcher is None:
+                read_bytes = self._readinto(view) or 0
+            else:
+                read_bytes = 0
+
+                while read_bytes < len(view):
+                    if self._chunk_pos >= self._chunk_len and not self._fill_chunk():
+                        break
+
+                    length = min(len(view) - read_bytes, self._chunk_len - self._chunk_pos)
+                    view[read_bytes:read_bytes + length] = self._chunk[self._chunk_pos:self._chunk_pos + length]
+                    self._chunk_pos += length
+                    read_bytes += length
+        except Exception as ex:
+            logger.error('Chunk read failed: %s', ex)
+            return 0
+
+        if read_bytes:
+            self.left_bytes -= read_bytes
+            self.bytes_read += read_bytes
+
+            if self.callback:
+                self.callback(self)
+
+        return read_bytes
+
     def write(self, buffer: Union[bytes, memoryview]):
         self.fd.write(buffer)
 
-    def __iter__(self) -> Optional[Union[bytes, memoryview]]:
-        yield self.read()
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            buffer = self.read()
+            if not buffer:
+                return
+            yield buffer
+
+    def __len__(self) -> int:
+        return self.total_size
 
     @staticmethod
     def create(file: FileType, mode: str = "r", chuck_size=DEFAULT_CHUCK_SIZE, encoding: AnyStr = DEFAULT_ENCODING,
-               callback: Optional[FileWrapperCallbackType] = None):
+               callback: Optional[FileWrapperCallbackType] = None, prefetch_depth: int = 0):
         is_binary: bool = 'b' in mode.lower()
 
         try:
@@ -121,23 +226,26 @@ class FileWrapper(object):
             if file_size > 0:
                 chuck_size = min(file_size, chuck_size)
             fd = open(file=file, mode=mode, buffering=chuck_size)
+
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    os.posix_fadvise(fd.fileno(), 0, file_size, os.POSIX_FADV_SEQUENTIAL)
+                    os.posix_fadvise(fd.fileno(), 0, file_size, os.POSIX_FADV_WILLNEED)
+                except OSError:
+                    pass
         else:
             fd = open(file=file, mode=mode, encoding=encoding)
 
-        return FileWrapper(file=fd, chunk_size=chuck_size, encoding=encoding, callback=callback)
+        return FileWrapper(file=fd, chunk_size=chuck_size, encoding=encoding, callback=callback,
+                           prefetch_depth=prefetch_depth if is_binary else 0)
 
 
 def _get_raw_data(data: Any) -> Optional[Union[FileWrapperBytesIO, HTTPResponse]]:
-    if isinstance(data, S3Object):
-        return data
-
-    if isinstance(data, StreamingBody):
+    if isinstance(data, (S3Object, StreamingBody)):
         return data
 
-    if hasattr(data, "raw_data"):
-        return data.raw_data
-
-    if hasattr(data, "raw"):
-        return data.raw
+    raw_data = getattr(data, 'raw_data', None)
+    if raw_data is not None:
+        return raw_data
 
-    return None
+    return getattr(data, 'raw', None)
@@ -1,8 +1,8 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 from io import BytesIO
-from typing import Any, AnyStr, Union
+from typing import Any, AnyStr, Optional, Union
 
-from common.utils import encode_with, reset, total_len
+from common.utils import encode_with, reset
 
 
 class FileWrapperBytesIO(BytesIO):
@@ -10,17 +10,25 @@ class FileWrapperBytesIO(BytesIO):
         buffer = encode_with(buffer, encoding=encoding)
         super(FileWrapperBytesIO, self).__init__(buffer)
 
+        with self.getbuffer() as view:
+            self._end = view.nbytes
+
+    def write(self, buffer: Union[bytes, memoryview]) -> int:
+        written = super(FileWrapperBytesIO, self).write(buffer)
+        self._end = max(self._end, self.tell())
+        return written
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        size = super(FileWrapperBytesIO, self).truncate(size)
+        self._end = min(self._end, size)
+        return size
+
     def _get_end(self) -> int:
-        current_pos = self.tell()
-        self.seek(0, 2)
-        length = self.tell()
-        self.seek(current_pos, 0)
-        return length
+        return self._end
 
     @property
     def len(self) -> int:
-        length = self._get_end()
-        return length - self.tell()
+        return self._end - self.tell()
 
     def append(self, buffer: Union[bytes, memoryview]):
         with reset(self):
@@ -28,8 +36,8 @@ class FileWrapperBytesIO(BytesIO):
         return written
 
     def smart_truncate(self):
-        to_be_read = total_len(self)
-        already_read = self._get_end() - to_be_read
+        already_read = self.tell()
+        to_be_read = self._end - already_read
 
         if already_read >= to_be_read:
             old_bytes = self.read()
@@ -0,0 +1,71 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from common.app_logger import get_logger
+
+logger = get_logger(__name__)
+
+_NO_PARTS_COUNT = -1
+
+_SCRIPT = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    parts_count INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (path, size, mtime_ns, parts_count));
+"""
+
+_SELECT = "SELECT hash FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND parts_count = ?"
+_INSERT = "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, parts_count, hash) VALUES (?, ?, ?, ?, ?)"
+
+
+class HashCache(object):
+
+    def __init__(self, name: str):
+        self._lock = threading.Lock()
+        self._connection = self._connect(name)
+
+    @staticmethod
+    def _connect(name: str) -> sqlite3.Connection:
+        try:
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+            connection = sqlite3.connect(name, check_same_thread=False)
+            connection.executescript(_SCRIPT)
+        except (OSError, sqlite3.Error) as ex:
+            logger.warning(f'Hash cache {name} is not available ({ex}), hashes will be cached in memory only.')
+            connection = sqlite3.connect(':memory:', check_same_thread=False)
+            connection.executescript(_SCRIPT)
+
+        return connection
+
+    def get(self, path: str, size: int, mtime_ns: int, parts_count: Optional[int] = None) -> Optional[str]:
+        parts_count = _NO_PARTS_COUNT if parts_count is None else parts_count
+
+        with self._lock:
+            row = self._connection.execute(_SELECT, (path, size, mtime_ns, parts_count)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def put(self, path: str, size: int, mtime_ns: int, parts_count: Optional[int], file_hash: str) -> None:
+        parts_count = _NO_PARTS_COUNT if parts_count is None else parts_count
+
+        with self._lock:
+            self._connection.execute(_INSERT, (path, size, mtime_ns, parts_count, file_hash))
+
+    def commit(self) -> None:
+        with self._lock:
+            try:
+                self._connection.commit()
+            except sqlite3.Error as ex:
+                logger.error(f'Exception {type(ex).__name__} with message: {str(ex)}.')
+
+    def close(self) -> None:
+        self.commit()
+
+        with self._lock:
+            self._connection.close()
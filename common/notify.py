@@ -1,20 +1,23 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
-import os
+import shutil
+import subprocess
+
+_NOTIFIER = shutil.which('terminal-notifier')
 
 
 # The notifier function
 def notify(message: str, title: str = None, subtitle: str = None):
-    arguments = []
+    if _NOTIFIER is None:
+        return
+
+    arguments = [_NOTIFIER]
 
     if title is not None and title != '':
-        t = '-title {!r}'.format(title)
-        arguments.append(t)
+        arguments += ['-title', title]
 
     if subtitle is not None and subtitle != '':
-        s = '-subtitle {!r}'.format(subtitle)
-        arguments.append(s)
+        arguments += ['-subtitle', subtitle]
 
-    m = '-message {!r}'.format(message)
-    arguments.append(m)
+    arguments += ['-message', message]
 
-    os.system('terminal-notifier {}'.format(' '.join(arguments)))
+    subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=True)
@@ -0,0 +1,47 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from common import consts
+
+
+class ChunkPrefetcher(object):
+
+    def __init__(self,
+                 read_chunk: Callable[[memoryview], Optional[int]],
+                 chunk_size: int,
+                 depth: int = consts.PREFETCH_DEPTH):
+        self._read_chunk = read_chunk
+        self._views = [memoryview(bytearray(chunk_size)) for _ in range(max(2, depth))]
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = deque()
+        self._next_slot = 0
+
+        # The slot handed out by the last read() is not refilled until the following read().
+        for _ in range(len(self._views) - 1):
+            self._submit()
+
+    def _submit(self) -> None:
+        view = self._views[self._next_slot]
+        self._next_slot = (self._next_slot + 1) % len(self._views)
+        self._pending.append((view, self._executor.submit(self._read_chunk, view)))
+
+    def read(self) -> Optional[memoryview]:
+        if not self._pending:
+            return None
+
+        view, future = self._pending.popleft()
+        read_bytes = future.result()
+
+        if not read_bytes:
+            self._pending.clear()
+            return None
+
+        self._submit()
+
+        return view[:read_bytes]
+
+    def close(self) -> None:
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
@@ -1,7 +1,11 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import threading
+import time
 from typing import AnyStr, Union
 
-from common.utils import get_terminal_width, get_parameter, print_progress_bar
+from common.utils import get_terminal_width, print_progress_bar
+
+PROGRESS_REDRAW_INTERVAL = 0.1
 
 
 class ProgressBar(object):
@@ -15,21 +19,45 @@ class ProgressBar(object):
         self.total = total
         self.prefix = caption
 
-    def __call__(self, *args, **kwargs):
-        iteration = get_parameter(args, 1, argument_type=(int, float), throw_error=False)
-        total = get_parameter(args, 1, argument_type=(int, float), throw_error=False)
-
-        if iteration is not None:
-            iteration = self.iteration
+        self._lock = threading.Lock()
+        self._last_time = 0.0
+        self._last_percent = -1
 
-        if total is None:
-            total = self.total
+    def _get_length(self) -> int:
+        return max(10, get_terminal_width() - len(self.prefix) - 12)
 
-        iteration = max(0, iteration)
-        iteration = min(iteration, total)
-
-        print_progress_bar(iteration=iteration, total=total, prefix=self.prefix)
-
-    def __new__(cls, *args, **kwargs):
-        instance = super(ProgressBar, cls).__new__(*args, **kwargs)
-        return instance
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            if len(args) == 1:
+                # boto3 transfer callback: bytes transferred since the previous call.
+                iteration = self.iteration + args[0]
+                total = self.total
+            elif len(args) == 2:
+                iteration, total = args
+            elif len(args) >= 3:
+                # sqlite3 backup progress: (status, remaining, total).
+                _, remaining, total = args[:3]
+                iteration = total - remaining
+            else:
+                iteration, total = self.iteration, self.total
+
+            if not total:
+                return
+
+            iteration = max(0, iteration)
+            iteration = min(iteration, total)
+
+            self.iteration = iteration
+            self.total = total
+
+            percent = int(iteration * 1000 / total)
+            now = time.monotonic()
+
+            if iteration != total:
+                if percent == self._last_percent or now - self._last_time < PROGRESS_REDRAW_INTERVAL:
+                    return
+
+            self._last_percent = percent
+            self._last_time = now
+
+        print_progress_bar(iteration=iteration, total=total, prefix=self.prefix, length=self._get_length())
@@ -7,13 +7,12 @@ logger = get_logger(__name__)
 class Singleton(object):
 
     def __new__(cls, *args, **kwargs):
-        if not hasattr(cls, 'instance'):
-            logger.debug(
-                f'Initialize instance for {cls.__name__} with '
-                f'{args=} and '
-                f'{kwargs=}.'
-            )
+        instance = cls.__dict__.get('_instance')
 
-            cls.instance = super(Singleton, cls).__new__(cls)
+        if instance is None:
+            logger.debug('Initialize instance for %s with args=%r and kwargs=%r.', cls.__name__, args, kwargs)
 
-        return cls.instance
+            instance = super(Singleton, cls).__new__(cls)
+            cls._instance = instance
+
+        return instance
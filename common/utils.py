@@ -1,22 +1,32 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 import contextlib
+import functools
 import io
+import itertools
 import json
-import math
 import os
 import random
 import re
 import shutil
+import signal
 import subprocess
 import tempfile
+import threading
 import time
-import uuid
-from typing import Any, Callable, List, Optional, Tuple, Union, Dict, AnyStr
+from typing import Any, Callable, List, Optional, Tuple, Union, Dict, AnyStr, Iterable, Iterator
 
 from common import consts
 from common.consts import ENCODER
 
-make_tmp_file_name = lambda: tempfile.mktemp(suffix="-" + str(uuid.uuid4().hex), dir=consts.TEMP_FOLDER)
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+
+_SECONDS_PER_MSECOND = 1.0 / consts.MSECONDS_PER_SECOND
+
+
+def make_tmp_file_name() -> str:
+    import uuid
+
+    return tempfile.mktemp(suffix="-" + str(uuid.uuid4().hex), dir=consts.TEMP_FOLDER)
 
 
 @contextlib.contextmanager
@@ -28,36 +38,55 @@ def reset(buffer):
 
 
 def is_callable(obj):
-    if hasattr(obj, '__call__'):
-        return True
-
     return callable(obj)
 
 
 
 
 def encode_with(buffer: AnyStr, encoding: AnyStr) -> Any:
-    if buffer is not None:
-
-        if isinstance(buffer, memoryview):
-            return buffer
-
-        if isinstance(buffer, io.BytesIO):
-            return buffer
+    if buffer is None or isinstance(buffer, (bytes, bytearray, memoryview)):
+        return buffer
 
-        if not isinstance(buffer, bytes):
-            return buffer.encode(encoding)
+    if isinstance(buffer, io.BytesIO):
+        return buffer.getbuffer()
 
-    return buffer
+    return buffer.encode(encoding)
 
 
 def read_data_from(data: Union[bytes, memoryview, io.IOBase], length: int = -1) -> Any:
-    if hasattr(data, 'read'):
-        return data.read(length)
+    read = getattr(data, 'read', None)
+    if read is not None:
+        return read(length)
     return data
 
 
+def _get_buffer_size(o: io.BytesIO) -> int:
+    with o.getbuffer() as view:
+        return view.nbytes
+
+
+def _get_file_size(o: Any) -> int:
+    return os.fstat(o.fileno()).st_size
+
+
+_LEN_DISPATCH = {
+    bytes: len,
+    bytearray: len,
+    memoryview: len,
+    str: len,
+    io.BytesIO: _get_buffer_size,
+    io.BufferedReader: _get_file_size,
+    io.BufferedWriter: _get_file_size,
+    io.BufferedRandom: _get_file_size,
+    io.FileIO: _get_file_size,
+}
+
+
 def total_len(o):
+    getter = _LEN_DISPATCH.get(type(o))
+    if getter is not None:
+        return getter(o)
+
     if hasattr(o, '__len__'):
         return len(o)
 
@@ -83,10 +112,9 @@ def total_len(o):
 
 
 def get_current_position(fobj: Any) -> int:
-    if fobj:
-        if hasattr(fobj, "tell"):
-            if is_callable(fobj.tell):
-                return calling_method(fobj.tell)
+    tell = getattr(fobj, 'tell', None)
+    if callable(tell):
+        return tell()
     return 0
 
 
@@ -108,6 +136,25 @@ def next_chunk(buffer: Union[bytes, memoryview, io.IOBase], chunk_size: int) ->
     return None
 
 
+def next_chunk_iobase(fd: io.IOBase, chunk_size: int) -> Optional[memoryview]:
+    buffer = fd.read(chunk_size)
+    return memoryview(buffer) if buffer else None
+
+
+def next_chunk_bytes(buffer: Union[bytes, bytearray, memoryview], position: int,
+                     chunk_size: int) -> Optional[memoryview]:
+    chunk = memoryview(buffer)[position:position + chunk_size]
+    return chunk if len(chunk) else None
+
+
+def batched(iterable: Iterable[Any], n: int) -> Iterator[Tuple[Any, ...]]:
+    iterator = iter(iterable)
+    batch = tuple(itertools.islice(iterator, n))
+    while batch:
+        yield batch
+        batch = tuple(itertools.islice(iterator, n))
+
+
 def to_list(fields: Union[Tuple[Any], List[Any], Dict[Any, AnyStr]]) -> List[Any]:
     if hasattr(fields, 'items'):
         return list(fields.items())
@@ -115,20 +162,16 @@ def to_list(fields: Union[Tuple[Any], List[Any], Dict[Any, AnyStr]]) -> List[Any
 
 
 def is_closed(obj: Any) -> bool:
-    if obj:
-        if hasattr(obj, "closed"):
-            if is_callable(obj.closed):
-                return obj.closed()
-            else:
-                return obj.closed
-    return True
+    closed = getattr(obj, 'closed', None) if obj is not None else None
+    if closed is None:
+        return True
+    return closed() if callable(closed) else closed
 
 
 def close(obj: Any) -> None:
-    if obj:
-        if hasattr(obj, "close"):
-            if is_callable(obj.close):
-                obj.close()
+    close_method = getattr(obj, 'close', None) if obj is not None else None
+    if callable(close_method):
+        close_method()
 
 
 
@@ -144,25 +187,21 @@ def is_equal(value1: Any, value2: Any) -> bool:
     Equal two values: value1 and value2.
     Return true if value1 is equal to value2. Otherwise, it returns false.
     """
-    if value1 is not None and value2 is not None:
-        if type(value1) == type(value2):
-            return value1 == value2
-        else:
-            return False
-    else:
-        if value1 is None and value2 is not None:
-            return False
-        elif value1 is not None and value2 is None:
-            return False
+    if value1 is value2:
         return True
 
+    if value1 is None or value2 is None:
+        return False
+
+    return type(value1) is type(value2) and value1 == value2
+
 
 def inscribe_message(message: Union[str, bytes], width: Optional[int] = None) -> str:
     if width is None:
         width = get_terminal_width()
 
     if isinstance(message, bytes):
-        message = message.decode(consts.ENCODER)
+        message = message.decode(ENCODER)
 
     if len(message) > (width - 3):
         left_part_len = width // 2
@@ -218,29 +257,25 @@ def get_string(o) -> str:
     return ret
 
 
+@functools.lru_cache(maxsize=1)
 def get_terminal_width() -> int:
-    terminal_width: int = 0
-    fallback: Tuple[int, int] = (80, 25)
-
-    term = os.environ.get('TERM', None)
-    if term is not None:
-        cols: str = run_command('tput', f'-T{term}', 'cols')
-        if cols is not None:
-            cols = cols.strip()
-            if cols.isdigit():
-                terminal_width = int(cols)
-    else:
-        fallback = (200, 100)
+    fallback: Tuple[int, int] = (80, 25) if 'TERM' in os.environ else (200, 100)
+    terminal_width, _ = shutil.get_terminal_size(fallback=fallback)
+    return terminal_width
 
-    if terminal_width == 0:
-        terminal_width, _ = shutil.get_terminal_size(fallback=fallback)
 
-    return terminal_width
+def _reset_terminal_width(*_) -> None:
+    get_terminal_width.cache_clear()
+
+
+def install_terminal_width_handler() -> None:
+    if hasattr(signal, 'SIGWINCH') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGWINCH, _reset_terminal_width)
 
 
 def show_error(message: Union[str, bytes], end: str = '') -> None:
     if isinstance(message, bytes):
-        message = message.decode(consts.ENCODER)
+        message = message.decode(ENCODER)
     print(str(message), end=end)
     # sys.stderr.write(message + end)
     # sys.stderr.flush()
@@ -248,7 +283,7 @@ def show_error(message: Union[str, bytes], end: str = '') -> None:
 
 def show_message(message: Union[str, bytes], end: str = '') -> None:
     if isinstance(message, bytes):
-        message = message.decode(consts.ENCODER)
+        message = message.decode(ENCODER)
     print(str(message), end=end)
     # sys.stdout.write(message + end)
     # sys.stdout.flush()
@@ -259,6 +294,9 @@ def retry(retry_on_exception: Callable[[Exception], bool] = None,
           wait_random_max: int = 5000,
           stop_max_attempt_number: int = 10,
           logger=None):
+    wait_bounds = tuple((int(wait_random_min * multiplier), int(wait_random_max * multiplier))
+                        for multiplier in (1.25 ** attempt for attempt in range(max(stop_max_attempt_number, 1))))
+
     def retry_decorate_func(fn):
         def wrapper(*args, **kwargs):
             attempt_number = 0
@@ -273,15 +311,14 @@ def retry(retry_on_exception: Callable[[Exception], bool] = None,
                             attempt_number += 1
                             if attempt_number >= stop_max_attempt_number:
                                 raise exception from None
-                            wait_time_out = random.randint(int(wait_random_min * math.pow(1.25, attempt_number - 1)),
-                                                           int(wait_random_max * math.pow(1.25, attempt_number - 1)))
+                            wait_time_out = random.randint(*wait_bounds[attempt_number - 1])
                             if logger is not None:
                                 logger.debug(
                                     f"Exception {type(exception).__name__} with message: "
                                     f"{exception}. Attempt number {attempt_number + 1}. "
-                                    f"Pause {wait_time_out / consts.MSECONDS_PER_SECOND} s."
+                                    f"Pause {wait_time_out * _SECONDS_PER_MSECOND} s."
                                 )
-                            time.sleep(float(wait_time_out) / float(consts.MSECONDS_PER_SECOND))
+                            time.sleep(wait_time_out * _SECONDS_PER_MSECOND)
                         else:
                             raise
                     else:
@@ -293,26 +330,8 @@ def retry(retry_on_exception: Callable[[Exception], bool] = None,
 
 
 def find_uuid(value: str) -> Optional[str]:
-    uuid_reg_patterns = (
-        r'[0-9a-f]{8}\-[0-9a-f]{4}\-[1-4][0-9a-f]{3}\-[89AB][0-9a-f]{3}\-[0-9a-f]{12}',
-        r'[0-9a-f]{8}-[0-9a-f]{4}-[5][0-9a-f]{3}-[89AB][0-9a-f]{3}-[0-9a-f]{12}',
-        r'[0-9a-f]{8}\\-([0-9a-f]{4}\\-){3}[0-9a-f]{12}',
-        r'[0-9a-fA-F]{8}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{12}'
-    )
-
-    for uuid_reg_pattern in uuid_reg_patterns:
-        result = re.search(uuid_reg_pattern, value, re.IGNORECASE)
-        if result is not None:
-            result = result.regs
-            if result is not None and len(result) > 0:
-                result = result[0]
-                start_pos, end_pos = result
-                if start_pos >= 0 and start_pos < len(value) and end_pos >= 0 and end_pos < len(value):
-                    result = value[start_pos:end_pos]
-                    return f"{{{result}}}"
-            return result
-
-    return None
+    match = _UUID_RE.search(value)
+    return f"{{{match.group(0)}}}" if match is not None else None
 
 
 def get_parameter(args: Union[Tuple[Any], List[Any]], index: int,
@@ -346,6 +365,11 @@ def get_parameter(args: Union[Tuple[Any], List[Any]], index: int,
 
 
 # Print iterations progress
+@functools.lru_cache(maxsize=16)
+def _get_progress_bar_parts(fill: str, length: int) -> Tuple[str, str]:
+    return fill * length, '-' * length
+
+
 def print_progress_bar(iteration, total, prefix='', suffix='', decimals=1, length=100, fill='█', printEnd="\r"):
     """
     Call in a loop to create terminal progress bar
@@ -359,14 +383,12 @@ def print_progress_bar(iteration, total, prefix='', suffix='', decimals=1, lengt
         fill        - Optional  : bar fill character (Str)
         printEnd    - Optional  : end character (e.g. "\r", "\r\n") (Str)
     """
-    percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(total)))
-
     filledLength = int(length * iteration // total)
-    bar = fill * filledLength + '-' * (length - filledLength)
-    print(f'\r{prefix} |{bar}| {percent}% {suffix}', end=printEnd)
+    filled_bar, empty_bar = _get_progress_bar_parts(fill, length)
     # Print New Line on Complete
-    if iteration == total:
-        print()
+    print(f'\r{prefix} |{filled_bar[:filledLength]}{empty_bar[filledLength:]}| '
+          f'{100 * (iteration / float(total)):.{decimals}f}% {suffix}',
+          end=printEnd + '\n' if iteration == total else printEnd)
 
 
 if not os.path.exists(consts.TEMP_FOLDER):
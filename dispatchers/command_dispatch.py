@@ -1,5 +1,4 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
-from functools import wraps
 from typing import Callable
 
 from common import app_logger
@@ -14,24 +13,20 @@ class CommandDispatch(object):
         self.longname = longname
 
     def __call__(self, func):
-        @wraps(func)
-        def wrapped_func(wself, *args, **kwargs):
-            logger.debug(f'wrapped_func {func.__name__}, args:{args}, kwargs: {args}')
-            func(wself, *args, **kwargs)
-
-        ci = CommandInfo
-        ci.commands += [ci(shortname=self.shortname, longname=self.longname, func=func)]
-        return wrapped_func
+        ci = CommandInfo(shortname=self.shortname, longname=self.longname, func=func)
+        CommandInfo.commands.append(ci)
+        CommandInfo.by_name.setdefault(self.shortname, ci)
+        CommandInfo.by_name.setdefault(self.longname, ci)
+        return func
 
     @staticmethod
     def func(name) -> Callable:
-        logger.debug(f'CommandDispatch.func({name})')
-
-        for ci in CommandInfo.commands:
-            if ci.shortname == name or ci.longname == name:
-                return ci.func
+        logger.debug('CommandDispatch.func(%s)', name)
 
-        raise RuntimeError('unknown command')
+        try:
+            return CommandInfo.by_name[name].func
+        except KeyError:
+            raise RuntimeError(f'unknown command {name!r}') from None
 
     @classmethod
     def execute(cls, name: str, *args, **kwargs):
@@ -1,15 +1,16 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
-from typing import Callable
+from typing import Callable, Dict, List
 
 from common.app_logger import get_logger
 
 logger = get_logger(__name__)
 
 class CommandInfo(object):
-    commands = []
+    commands: List['CommandInfo'] = []
+    by_name: Dict[str, 'CommandInfo'] = {}
 
     def __init__(self, shortname: str, longname: str, func: Callable):
-        logger.debug(f'CommandInfo: shortname={shortname}, longname={longname}, func={func}')
+        logger.debug('CommandInfo: shortname=%s, longname=%s, func=%s', shortname, longname, func)
         self.shortname = shortname
         self.longname = longname
         self.func = func
@@ -1,21 +1,21 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
+import calendar
+import hashlib
 import os
-import sys
-import time
-from datetime import datetime
-from typing import Any, Dict, Optional, List
+import stat
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, List, Tuple
 
 import psutil
-import pytz
-from dateutil import tz
 
 from common import app_logger, consts, utils
-from common.consts import FILE_SIZE_LIMIT
 from common.convertors import remove_end_path_sep, make_template_from_string, size_to_human, remove_start_separator, \
-    append_end_path_sep, append_start_path_sep, remove_start_path_sep, convert_value_to_type, make_string_from_template, \
+    append_end_path_sep, append_start_path_sep, convert_value_to_type, make_string_from_template, \
     get_string_case, encode_string
-from common.files import get_file_size, get_file_etag, calc_file_hash
+from common.files import get_file_etag, calc_file_hash, get_etag_part_size, get_etag_parts_count
+from common.hashcache import HashCache
 from common.metasingleton import MetaSingleton
 from common.singleton import Singleton
 from common.utils import print_progress_bar, get_terminal_width
@@ -23,6 +23,8 @@ from s3.storage import S3Storage
 
 logger = app_logger.get_logger(__name__)
 
+_blake2b = hashlib.blake2b
+
 INFO_FIELD_ID = 'id'
 INFO_FIELD_NAME = 'name'
 INFO_FIELD_SIZE = 'size'
@@ -43,37 +45,96 @@ OP_RESTORE = 'restore'
 
 
 def _get_name_hash(name: str) -> str:
-    name_hash = hash(name)
-    name_hash = name_hash & ((1 << 64) - 1)
-    bit_length: int = name_hash.bit_length()
-    bytes_length: int = (bit_length // 8) + (1 if (bit_length % 8) != 0 else 0)
+    return _blake2b(name.encode(consts.ENCODER, 'surrogateescape'), digest_size=8).hexdigest()
 
-    return name_hash.to_bytes(bytes_length, sys.byteorder).hex()
 
+def _get_timestamp(value: datetime) -> int:
+    return calendar.timegm(value.utctimetuple())
 
-def _get_file_info(file: str) -> Optional[Dict[str, Any]]:
-    if not os.path.exists(file):
-        return None
 
-    mtime = datetime.fromtimestamp(os.stat(file).st_mtime, tz=tz.UTC).replace(tzinfo=pytz.UTC)
-    mtime = datetime.fromtimestamp(time.mktime(mtime.timetuple()))
+def _get_datetime(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _get_file_info(file: str, file_stat: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
+    if file_stat is None:
+        try:
+            file_stat = os.stat(file)
+        except OSError:
+            return None
 
     file_info = {
         INFO_FIELD_NAME: file,
-        INFO_FIELD_SIZE: os.stat(file).st_size,
-        INFO_FIELD_MTIME: mtime
+        INFO_FIELD_SIZE: file_stat.st_size,
+        INFO_FIELD_MTIME: file_stat.st_mtime_ns // consts.NSECONDS_PER_SECOND
     }
 
     return file_info
 
 
+def _get_regular_file_stat(path: str) -> Optional[os.stat_result]:
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+
+    return file_stat if stat.S_ISREG(file_stat.st_mode) else None
+
+
+def _scan_dir(path: str,
+              files: List[Tuple[str, os.stat_result]],
+              dirs: Optional[List[str]] = None) -> None:
+    try:
+        entries = os.scandir(path)
+    except OSError as ex:
+        logger.error(f'Exception {type(ex).__name__} with message: {str(ex)}.')
+        return
+
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if dirs is None:
+                        _scan_dir(entry.path, files)
+                    else:
+                        dirs.append(entry.path)
+                elif entry.is_file() and not entry.name.startswith(('.', '~')):
+                    files.append((entry.path, entry.stat()))
+            except OSError as ex:
+                logger.error(f'Exception {type(ex).__name__} with message: {str(ex)}.')
+
+
+def _walk_subtree(path: str) -> List[Tuple[str, os.stat_result]]:
+    files = []
+    _scan_dir(path, files)
+    return files
+
+
+def _walk_local_files(local_path: str) -> List[Tuple[str, os.stat_result]]:
+    files = []
+    dirs = [local_path]
+
+    for _ in range(consts.WALK_PARALLEL_DEPTH):
+        subdirs = []
+        for path in dirs:
+            _scan_dir(path, files, subdirs)
+        dirs = subdirs
+
+    if dirs:
+        with ThreadPoolExecutor(max_workers=min(len(dirs), consts.MAX_WALK_WORKERS)) as executor:
+            for subtree_files in executor.map(_walk_subtree, dirs):
+                files.extend(subtree_files)
+
+    return files
+
+
 class S3Base(metaclass=MetaSingleton):
 
     def __init__(self, bucket: str, local_path: Optional[str] = None, remote_path: Optional[str] = None):
         self._bucket_name = bucket
         self._local_path = local_path
         self._chuck_size = int(float(psutil.virtual_memory().free) * 0.75)
-        self._hash_cache = {}
+        self._hash_cache = HashCache(consts.HASH_CACHE_FILE)
         self._inserted_new_files = 0
         self._updated_files = 0
         self._deleted_files = 0
@@ -91,7 +152,8 @@ class S3Base(metaclass=MetaSingleton):
         logger.debug(f"Chuck size is {size_to_human(self._chuck_size)}")
 
     def __del__(self):
-        pass
+        if hasattr(self, '_hash_cache'):
+            self._hash_cache.close()
 
     def __call__(self):
         self.process()
@@ -171,8 +233,11 @@ class S3Base(metaclass=MetaSingleton):
         if self._storage.is_exist(self._archive_path):
             self._copy_object(src=self._archive_path, dst=self._bak_archive_path)
 
-    def _calc_hash(self, file_path: str) -> str:
-        file_hash = self._hash_cache.get(file_path, None)
+    def _calc_hash(self, file_path: str, parts_count: Optional[int] = None) -> str:
+        file_stat = os.stat(file_path)
+        cache_key = (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns, parts_count)
+
+        file_hash = self._hash_cache.get(*cache_key)
 
         if file_hash is None:
             templates = {
@@ -190,12 +255,16 @@ class S3Base(metaclass=MetaSingleton):
                 f"for {make_template_from_string(file_path, **templates)}"
             )
 
-            if get_file_size(file_name=file_path) > FILE_SIZE_LIMIT:
+            if parts_count is None:
                 file_hash = get_file_etag(file_name=file_path, show_progress=self._show_progress)
+            elif parts_count > 0:
+                file_hash = get_file_etag(file_name=file_path,
+                                          show_progress=self._show_progress,
+                                          part_size=get_etag_part_size(file_stat.st_size, parts_count))
             else:
                 file_hash = calc_file_hash(file_object=file_path, show_progress=self._show_progress)
 
-            self._hash_cache[file_path] = file_hash
+            self._hash_cache.put(*cache_key, file_hash)
 
             logger.debug("Calculate completed.")
 
@@ -210,52 +279,47 @@ class S3Base(metaclass=MetaSingleton):
 
                 file_name_new = file_info_new.get(INFO_FIELD_NAME)
                 file_size_new = file_info_new.get(INFO_FIELD_SIZE, 0)
-                file_mtime_new = file_info_new.get(INFO_FIELD_MTIME, datetime.min)
-                file_mtime_new = file_mtime_new.replace(tzinfo=pytz.UTC)
-                file_mtime_new = datetime.fromtimestamp(time.mktime(file_mtime_new.timetuple()))
+                file_mtime_new = file_info_new.get(INFO_FIELD_MTIME, 0)
                 file_hash_new = file_info_new.get(INFO_FIELD_HASH, '')
 
                 file_name_old = file_info_old.get(INFO_FIELD_NAME)
                 file_size_old = file_info_old.get(INFO_FIELD_SIZE, 0)
-                file_mtime_old = file_info_old.get(INFO_FIELD_MTIME, datetime.min)
-                file_mtime_old = file_mtime_old.replace(tzinfo=pytz.UTC)
-                file_mtime_old = datetime.fromtimestamp(time.mktime(file_mtime_old.timetuple()))
-                file_hash_old = file_info_old.get(INFO_FIELD_HASH, '')
+                file_mtime_old = file_info_old.get(INFO_FIELD_MTIME, 0)
+                file_hash_old = (file_info_old.get(INFO_FIELD_HASH, None) or '').strip('"')
 
                 if file_mtime_old == file_mtime_new:
                     return None
 
-                messages.append(
-                    "The size of the remote file "
-                    f"({consts.CYAN + consts.BOLD}{size_to_human(file_size_old)}{consts.NBOLD + consts.DEF})"
-                    " differs from the size of the local file "
-                    f"({consts.CYAN + consts.BOLD}{size_to_human(file_size_new)}{consts.NBOLD + consts.DEF})"
-                )
-
-                if file_size_old == file_size_new:
-                    return None
-
                 messages.append(
                     f"The time when the remote file was last modified "
-                    f"({consts.CYAN + consts.BOLD}{file_mtime_old}{consts.NBOLD + consts.DEF})"
+                    f"({consts.CYAN + consts.BOLD}{_get_datetime(file_mtime_old)}{consts.NBOLD + consts.DEF})"
                     " differs from the time when the local file was last modified "
-                    f"({consts.CYAN + consts.BOLD}{file_mtime_new}{consts.NBOLD + consts.DEF})"
+                    f"({consts.CYAN + consts.BOLD}{_get_datetime(file_mtime_new)}{consts.NBOLD + consts.DEF})"
                 )
 
-                if file_hash_new == '':
-                    local_file_name = self._make_local_file(file_name_new)
-                    file_hash_new = self._calc_hash(file_path=local_file_name)
-                    file_info_new[INFO_FIELD_HASH] = file_hash_new
-
-                if file_hash_old == file_hash_new:
-                    return None
-
-                messages.append(
-                    f"The ETag of the remote file "
-                    f"({consts.CYAN + consts.BOLD}{file_hash_old}{consts.NBOLD + consts.DEF})"
-                    " differs from the ETag of the local file "
-                    f"({consts.CYAN + consts.BOLD}{file_hash_new}{consts.NBOLD + consts.DEF})"
-                )
+                if file_size_old != file_size_new:
+                    messages.append(
+                        "The size of the remote file "
+                        f"({consts.CYAN + consts.BOLD}{size_to_human(file_size_old)}{consts.NBOLD + consts.DEF})"
+                        " differs from the size of the local file "
+                        f"({consts.CYAN + consts.BOLD}{size_to_human(file_size_new)}{consts.NBOLD + consts.DEF})"
+                    )
+                else:
+                    if file_hash_new == '':
+                        local_file_name = self._make_local_file(file_name_new)
+                        file_hash_new = self._calc_hash(file_path=local_file_name,
+                                                        parts_count=get_etag_parts_count(file_hash_old))
+                        file_info_new[INFO_FIELD_HASH] = file_hash_new
+
+                    if file_hash_old == file_hash_new:
+                        return None
+
+                    messages.append(
+                        f"The ETag of the remote file "
+                        f"({consts.CYAN + consts.BOLD}{file_hash_old}{consts.NBOLD + consts.DEF})"
+                        " differs from the ETag of the local file "
+                        f"({consts.CYAN + consts.BOLD}{file_hash_new}{consts.NBOLD + consts.DEF})"
+                    )
 
                 for ix, value in enumerate(messages):
                     if ix == 0:
@@ -299,21 +363,11 @@ class S3Base(metaclass=MetaSingleton):
         return result
 
     def _copy_object(self, src: str, dst: str) -> None:
-        copied_files = 0
-
         logger.info(f"Copy objects from {src} to {dst}")
 
-        objects_count = self.storage.get_objects_count(prefix=self._archive_path)
-        completed_objects_count = 0
-
-        for fetch_object in self.storage.fetch_bucket_objects(prefix=src):
-            if self._show_progress:
-                completed_objects_count += 1
-                print_progress_bar(iteration=completed_objects_count,
-                                   total=objects_count,
-                                   prefix='Copying objects',
-                                   length=get_terminal_width())
+        copy_pairs = []
 
+        for fetch_object in self.storage.fetch_all_objects(prefix=src) or []:
             src_name = fetch_object.get('Key')
             dst_name = src_name
             if dst_name.startswith(src):
@@ -323,11 +377,30 @@ class S3Base(metaclass=MetaSingleton):
                 )
 
             if src_name and dst_name and src_name != dst_name:
-                self.storage.copy_object(src_remote_path=src_name, dst_remote_path=dst_name)
+                copy_pairs.append((src_name, dst_name))
+
+        objects_count = len(copy_pairs)
+
+        if objects_count == 0:
+            return
+
+        copied_files = 0
+
+        with ThreadPoolExecutor(max_workers=min(objects_count, consts.MAX_UPLOAD_WORKERS)) as executor:
+            futures = [executor.submit(self.storage.copy_object, src_remote_path=src_name, dst_remote_path=dst_name)
+                       for src_name, dst_name in copy_pairs]
+
+            for future in as_completed(futures):
+                future.result()
                 copied_files += 1
 
-        if copied_files > 0:
-            logger.info(f'Copied {copied_files} object(s).')
+                if self._show_progress:
+                    print_progress_bar(iteration=copied_files,
+                                       total=objects_count,
+                                       prefix='Copying objects',
+                                       length=get_terminal_width())
+
+        logger.info(f'Copied {copied_files} object(s).')
 
     def _fetch_files(self) -> Dict[str, Any]:
         files = {}
@@ -346,7 +419,9 @@ class S3Base(metaclass=MetaSingleton):
         if opetations is None:
             opetations = {}
 
-        if os.path.isfile(local_path):
+        local_file_stat = _get_regular_file_stat(local_path)
+
+        if local_file_stat is not None:
             local_file_name = local_path
             self._local_path = os.path.dirname(local_file_name)
 
@@ -358,33 +433,26 @@ class S3Base(metaclass=MetaSingleton):
 
             name_hash = _get_name_hash(name)
 
-            file_info = _get_file_info(file=local_file_name)
+            file_info = _get_file_info(file=local_file_name, file_stat=local_file_stat)
 
             operation_info = opetations.setdefault(name_hash, {})
             operation_info[INFO_NEW] = file_info
             operation_info[INFO_OP] = OP_INSERT
         else:
-            for root, dirs, files in os.walk(self._local_path):
-                for file in files:
-                    if not file.startswith('.') and not file.startswith('~'):
-                        local_file_path = os.path.join(
-                            append_end_path_sep(root),
-                            remove_start_path_sep(file)
-                        )
-
-                        name = local_file_path
+            for local_file_path, file_stat in _walk_local_files(local_path):
+                name = local_file_path
 
-                        if name.startswith(local_path):
-                            name = name[len(local_path):]
-                            name = append_start_path_sep(name)
+                if name.startswith(local_path):
+                    name = name[len(local_path):]
+                    name = append_start_path_sep(name)
 
-                        name_hash = _get_name_hash(name)
+                name_hash = _get_name_hash(name)
 
-                        file_info = _get_file_info(file=local_file_path)
+                file_info = _get_file_info(file=local_file_path, file_stat=file_stat)
 
-                        operation_info = opetations.setdefault(name_hash, {})
-                        operation_info[INFO_NEW] = file_info
-                        operation_info[INFO_OP] = OP_INSERT
+                operation_info = opetations.setdefault(name_hash, {})
+                operation_info[INFO_NEW] = file_info
+                operation_info[INFO_OP] = OP_INSERT
 
         return opetations
 
@@ -398,12 +466,13 @@ class S3Base(metaclass=MetaSingleton):
             operations = {}
 
         prefix = append_end_path_sep(remote_path)
-        objects_count = self.storage.get_objects_count(prefix=prefix)
+        remote_objects = self.storage.fetch_all_objects(prefix=prefix) or []
+        objects_count = len(remote_objects)
 
         if objects_count > 0:
             completed_objects_count = 0
 
-            for remote_object in self.storage.fetch_bucket_objects(prefix=prefix):
+            for remote_object in remote_objects:
                 if self.show_progress:
                     completed_objects_count += 1
                     print_progress_bar(iteration=completed_objects_count,
@@ -421,9 +490,8 @@ class S3Base(metaclass=MetaSingleton):
                 name_hash = _get_name_hash(name)
 
                 file_size = convert_value_to_type(remote_object.get('Size', None), to_type=int)
-                file_mtime = convert_value_to_type(remote_object.get('LastModified', None), to_type=datetime)
-                file_mtime = file_mtime.replace(tzinfo=pytz.UTC)
-                file_mtime = datetime.fromtimestamp(time.mktime(file_mtime.timetuple()))
+                file_mtime = _get_timestamp(
+                    convert_value_to_type(remote_object.get('LastModified', None), to_type=datetime))
                 file_hash = convert_value_to_type(remote_object.get('ETag', None), to_type=str)
 
                 if file_hash is not None:
@@ -465,7 +533,8 @@ class S3Base(metaclass=MetaSingleton):
     def _make_remote_file(self, file_name: str) -> str:
         return make_string_from_template(file_name, path=remove_end_path_sep(self._archive_path))
 
-    def _do_operation(self, files: Dict[str, Any]):
+    def _do_operation(self, files: Dict[str, Any], local_path: Optional[str] = None,
+                      remote_path: Optional[str] = None):
         pass
         # TODO Restore the following lines after testing
         # if len(self._files) > 0:
@@ -488,14 +557,9 @@ class S3Base(metaclass=MetaSingleton):
         self._show_statistics()
 
     def _process_pre(self):
-        delete_files = []
-
-        for file_object in self.storage.fetch_bucket_objects(prefix=consts.HOME_FOLDER):
-            file_path = file_object.get('Key', None)
-            if file_path is not None:
-                delete_files.append({
-                    'Key': file_path
-                })
+        delete_files = [{'Key': file_object['Key']}
+                        for file_object in self.storage.fetch_all_objects(prefix=consts.HOME_FOLDER) or []
+                        if file_object.get('Key') is not None]
 
         if len(delete_files) > 0:
             self.storage.delete_objects(delete_files)
@@ -504,11 +568,9 @@ class S3Base(metaclass=MetaSingleton):
         self._remove_old_objects()
 
     def _remove_old_objects(self):
-        fetched_old_objects = self.storage.get_old_objects()
-        if len(fetched_old_objects) > 0:
-            fetched_old_objects = [{'Key': fetched_object.get('Key')} for fetched_object in fetched_old_objects]
+        fetched_old_objects = self.storage.get_old_objects() or []
         if len(fetched_old_objects) > 0:
-            self.storage.delete_objects(fetched_old_objects)
+            self.storage.delete_objects([{'Key': fetched_object.get('Key')} for fetched_object in fetched_old_objects])
 
     def _show_statistics(self):
         statistics = []
@@ -573,6 +635,7 @@ class S3Base(metaclass=MetaSingleton):
         try:
             self._operation()
         finally:
+            self._hash_cache.commit()
             self._process_post()
 
     def set_local_path(self, local_path: str):
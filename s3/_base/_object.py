@@ -6,9 +6,11 @@ from typing import Dict, Union
 
 from botocore.response import StreamingBody
 
-from common.consts import BUFFER_SIZE
+from common.consts import BUFFER_SIZE, STREAMING_BODY_CHUNK_SIZE
 from common.utils import total_len
 
+StreamingBody._DEFAULT_CHUNK_SIZE = STREAMING_BODY_CHUNK_SIZE
+
 
 class S3Object(object):
     def __init__(self, name: Union[str, bytes], response: Union[Dict, StreamingBody]):
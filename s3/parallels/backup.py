@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 from common.app_logger import get_logger
+from common.convertors import append_end_path_sep
 from s3._base._base import OP_BACKUP, INFO_FIELD_NAME, INFO_NEW, INFO_OLD
 from s3._base._consts import VM_SNAPSHOT_DAYS_COUNT
 from s3._base._typing import VM_UUID
@@ -19,13 +20,8 @@ class S3ParallelsBackup(S3ParallelsOperation):
             return OP_BACKUP
         return super(S3ParallelsBackup, self)._compare_files(file_info_old, file_info_new)
 
-    def _do_file_operation(self, local_file_info: Dict[str, Any], remote_file_info: Dict[str, Any]):
-        local_file_name = local_file_info.get('name')
-        remote_file_name = remote_file_info.get('name')
-        logger.info(f'Upload file {remote_file_name}...')
-        self.storage.upload_file(local_file_path=local_file_name, remote_file_path=remote_file_name)
-
-    def _do_operation(self, files: Dict[str, Any]):
+    def _do_operation(self, files: Dict[str, Any], local_path: Optional[str] = None,
+                      remote_path: Optional[str] = None):
         remote_files_list = self._get_remote_files_list(files)
         if len(remote_files_list) > 0:
             objects_for_delete = [{'Key': info.get(INFO_FIELD_NAME)} for info in remote_files_list]
@@ -33,11 +29,35 @@ class S3ParallelsBackup(S3ParallelsOperation):
             if len(objects_for_delete) > 0:
                 self.storage.delete_objects(objects=objects_for_delete)
 
-        for _, operation_info in files.items():
-            local_file = operation_info.get(INFO_NEW)
-            remote_file = operation_info.get(INFO_OLD)
+        local_prefix = self._local_path if local_path is None else local_path
+        local_prefix_len = len(local_prefix)
+        remote_prefix = append_end_path_sep(self._archive_path if remote_path is None else remote_path)
+
+        operations_list = []
+
+        for operation_info in files.values():
+            local_file_info = operation_info.get(INFO_NEW)
+
+            if local_file_info is None:
+                continue
+
+            remote_file_info = operation_info.get(INFO_OLD)
+
+            if remote_file_info is None:
+                local_file_name = local_file_info.get(INFO_FIELD_NAME)
+
+                if local_file_name.startswith(local_prefix):
+                    local_file_name = local_file_name[local_prefix_len:]
+
+                remote_file_info = {INFO_FIELD_NAME: remote_prefix + local_file_name.lstrip('/\\')}
+
+            operations_list.append((local_file_info, remote_file_info))
 
-            self._do_file_operation(local_file_info=local_file, remote_file_info=remote_file)
+        self.storage.upload_files(
+            [(local_file_info.get(INFO_FIELD_NAME), remote_file_info.get(INFO_FIELD_NAME))
+             for local_file_info, remote_file_info in operations_list],
+            show_progress=self.show_progress
+        )
 
     def _run_process(self, vm_info: Dict[str, Any]):
         super(S3ParallelsBackup, self)._run_process(vm_info=vm_info)
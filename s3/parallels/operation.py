@@ -1,7 +1,6 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 import json
 import os
-import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 from uuid import UUID
@@ -12,12 +11,13 @@ from common import dbase
 from common.app_logger import get_logger
 from common.consts import WORK_FOLDER
 from common.convertors import append_start_path_sep, append_end_path_sep, \
-    remove_start_path_sep, convert_value_to_type, \
+    convert_value_to_type, \
     decode_string, encode_string, remove_end_path_sep, time_to_string
 from common.dbase import SQLBuilder
 from common.notify import notify
 from common.utils import print_progress_bar, get_terminal_width
-from s3._base._base import S3Base, _get_name_hash, _get_file_info, INFO_NEW, INFO_OP, OP_INSERT, INFO_FIELD_NAME, \
+from s3._base._base import S3Base, _get_name_hash, _get_file_info, _get_regular_file_stat, _get_timestamp, \
+    _walk_local_files, INFO_NEW, INFO_OP, OP_INSERT, INFO_FIELD_NAME, \
     INFO_FIELD_SIZE, INFO_FIELD_MTIME, INFO_FIELD_HASH, OP_DELETE, INFO_OLD
 from s3._base._consts import VM_STATUS_RUNNING, VM_STATUS_PAUSED, VM_SNAPSHOT_DAYS_COUNT, VM_SNAPSHOT_COUNT, \
     VM_SNAPSHOT_POWER_ON, VM_TYPE_PACKED, VM_TYPE_ARCHIVED
@@ -117,7 +117,9 @@ class S3ParallelsOperation(S3Base):
         if operations is None:
             operations = {}
 
-        if os.path.isfile(local_path):
+        local_file_stat = _get_regular_file_stat(local_path)
+
+        if local_file_stat is not None:
             local_file_name = local_path
             local_path = os.path.dirname(local_file_name)
 
@@ -129,32 +131,25 @@ class S3ParallelsOperation(S3Base):
 
             name_hash = _get_name_hash(name)
 
-            file_info = _get_file_info(file=local_file_name)
+            file_info = _get_file_info(file=local_file_name, file_stat=local_file_stat)
 
             operation_info = operations.setdefault(name_hash, {})
             operation_info[INFO_NEW] = file_info
             operation_info[INFO_OP] = OP_INSERT
         else:
-            for root, dirs, files in os.walk(self._local_path):
-                for file in files:
-                    if not file.startswith('.') and not file.startswith('~'):
-                        local_file_path = os.path.join(
-                            append_end_path_sep(root),
-                            remove_start_path_sep(file)
-                        )
-
-                        name = local_file_path
-                        if name.startswith(local_path):
-                            name = name[len(local_path):]
-                            name = append_start_path_sep(name)
+            for local_file_path, file_stat in _walk_local_files(local_path):
+                name = local_file_path
+                if name.startswith(local_path):
+                    name = name[len(local_path):]
+                    name = append_start_path_sep(name)
 
-                        name_hash = _get_name_hash(name)
+                name_hash = _get_name_hash(name)
 
-                        file_info = _get_file_info(file=local_file_path)
+                file_info = _get_file_info(file=local_file_path, file_stat=file_stat)
 
-                        operation_info = operations.setdefault(name_hash, {})
-                        operation_info[INFO_NEW] = file_info
-                        operation_info[INFO_OP] = OP_INSERT
+                operation_info = operations.setdefault(name_hash, {})
+                operation_info[INFO_NEW] = file_info
+                operation_info[INFO_OP] = OP_INSERT
 
         return operations
 
@@ -168,12 +163,13 @@ class S3ParallelsOperation(S3Base):
             operations = {}
 
         prefix = append_end_path_sep(remote_path)
-        objects_count = self.storage.get_objects_count(prefix=prefix)
+        remote_objects = self.storage.fetch_all_objects(prefix=prefix) or []
+        objects_count = len(remote_objects)
 
         if objects_count > 0:
             loaded_objects_count = 0
 
-            for remote_object in self.storage.fetch_bucket_objects(prefix=prefix):
+            for remote_object in remote_objects:
                 if self.show_progress:
                     loaded_objects_count += 1
                     print_progress_bar(iteration=loaded_objects_count,
@@ -190,10 +186,8 @@ class S3ParallelsOperation(S3Base):
                 name_hash = _get_name_hash(name)
 
                 file_size = convert_value_to_type(remote_object.get('Size', None), to_type=int)
-                file_mtime = convert_value_to_type(remote_object.get('LastModified', None),
-                                                   to_type=datetime)
-                file_mtime = file_mtime.replace(tzinfo=pytz.UTC)
-                file_mtime = datetime.fromtimestamp(time.mktime(file_mtime.timetuple()))
+                file_mtime = _get_timestamp(
+                    convert_value_to_type(remote_object.get('LastModified', None), to_type=datetime))
                 file_hash = convert_value_to_type(remote_object.get('ETag', None), to_type=str)
 
                 if file_hash is not None:
@@ -400,7 +394,7 @@ class S3ParallelsOperation(S3Base):
                     archive_path = os.path.join(archive_path, archive_name)
 
                     self._copy_object(src=remote_path, dst=archive_path)
-                    self._do_operation(files)
+                    self._do_operation(files, local_path=locale_path, remote_path=remote_path)
 
     def _check_exists_vm(self, vm_id: VM_UUID) -> bool:
         try:
@@ -474,13 +468,16 @@ class S3ParallelsOperation(S3Base):
         if hasattr(self, '_storage'):
             del self._storage
 
-        if self.vm_uuid is None:
-            vm_id_list = self.parallels.get_vm_list()
+        try:
+            if self.vm_uuid is None:
+                vm_id_list = self.parallels.get_vm_list()
 
-            for vm_id in vm_id_list:
-                self._do_run(vm_id=vm_id)
-        else:
-            self._do_run(vm_id=self.vm_uuid)
+                for vm_id in vm_id_list:
+                    self._do_run(vm_id=vm_id)
+            else:
+                self._do_run(vm_id=self.vm_uuid)
+        finally:
+            self._hash_cache.commit()
 
     @classmethod
     def execute(cls, *args, **kwargs):
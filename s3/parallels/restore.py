@@ -24,10 +24,11 @@ class S3ParallelsRestore(S3ParallelsOperation):
     def _do_file_operation(self, local_file_info: Dict[str, Any], remote_file_info: Dict[str, Any]):
         local_file_name = local_file_info.get('name')
         remote_file_name = remote_file_info.get('name')
-        logger.info(f'Download file {remote_file_name}...')
+        logger.info('Download file %s...', remote_file_name)
         self.storage.download_file(local_file_path=local_file_name, remote_file_path=remote_file_name)
 
-    def _do_operation(self, files: Dict[str, Any]):
+    def _do_operation(self, files: Dict[str, Any], local_path: Optional[str] = None,
+                      remote_path: Optional[str] = None):
         local_files_list = self._get_local_files_list(files)
         local_files_list = [info.get(INFO_FIELD_NAME) for info in local_files_list]
 
@@ -1,9 +1,11 @@
 #  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
 
+import errno
 import os
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union, Tuple
+from typing import Any, Callable, Dict, List, Optional, Union, Tuple
 
 import boto3
 import pytz
@@ -13,10 +15,15 @@ from dateutil import tz
 
 from common import app_logger
 from common import utils
-from common.consts import CPU_COUNT, FILE_SIZE_LIMIT, BUFFER_SIZE, MAX_CONCURRENCY, CLEAR_TO_END_LINE
+from common.consts import CPU_COUNT, MAX_CONCURRENCY, CLEAR_TO_END_LINE, MAX_UPLOAD_WORKERS, \
+    MULTIPART_THRESHOLD, MULTIPART_CHUNKSIZE, MAX_DELETE_OBJECTS, MAX_LIST_WORKERS, MAX_PART_UPLOADS, \
+    LIST_DESCEND_DEPTH
+from common.bufferpool import BufferPool, pread_into
+from common.files import get_multipart_part_size
 from common.progress_bar import ProgressBar
 from config import configure
 from s3._base._object import S3Object
+from s3.uploaderror import S3UploadError
 from s3.utils import client_exception_handler
 
 logger = app_logger.get_logger(__name__)
@@ -28,6 +35,8 @@ class S3Storage(object):
 
     def __init__(self, bucket: Optional[Union[str, bytes]] = None):
         self._lock = threading.Lock()
+        self._part_executor = None
+        self._part_buffers = None
 
         try:
             logger.info(f'Open S3 AWS Session...')
@@ -39,7 +48,7 @@ class S3Storage(object):
             client_config = Config(
                 connect_timeout=10.0,
                 read_timeout=20.0,
-                max_pool_connections=CPU_COUNT,
+                max_pool_connections=max(CPU_COUNT, MAX_UPLOAD_WORKERS + MAX_PART_UPLOADS),
                 retries={
                     'total_max_attempts': 200,
                     'max_attempts': 100,
@@ -93,8 +102,8 @@ class S3Storage(object):
         logger.debug(f'Initialize configure...')
 
         self._config = TransferConfig(
-            multipart_threshold=FILE_SIZE_LIMIT,
-            multipart_chunksize=BUFFER_SIZE,
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
             max_concurrency=MAX_CONCURRENCY,
             use_threads=True
         )
@@ -182,9 +191,52 @@ class S3Storage(object):
                     break
         return ret
 
+    def _fetch_objects_and_prefixes(self, prefix: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        objects: List[Dict[str, Any]] = []
+        prefixes: List[str] = []
+
+        params = {'Bucket': self._bucket, 'Delimiter': '/', 'FetchOwner': True}
+        if prefix is not None:
+            params['Prefix'] = prefix
+
+        while True:
+            response = self._client.list_objects_v2(**params)
+
+            objects.extend(response.get('Contents', ()))
+            prefixes.extend(common_prefix['Prefix'] for common_prefix in response.get('CommonPrefixes', ()))
+
+            continuation_key = response.get('NextContinuationToken', None)
+            if not response.get('IsTruncated', False) or continuation_key is None:
+                break
+
+            params['ContinuationToken'] = continuation_key
+
+        return objects, prefixes
+
+    @client_exception_handler()
+    def fetch_all_objects(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        objects, prefixes = self._fetch_objects_and_prefixes(prefix=prefix)
+
+        for _ in range(LIST_DESCEND_DEPTH):
+            if len(prefixes) != 1:
+                break
+
+            sub_objects, prefixes = self._fetch_objects_and_prefixes(prefix=prefixes[0])
+            objects.extend(sub_objects)
+
+        if len(prefixes) == 1:
+            objects.extend(self._fetch_all_objects(prefix=prefixes[0]))
+        elif len(prefixes) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(prefixes), MAX_LIST_WORKERS)) as executor:
+                for prefix_objects in executor.map(lambda sub_prefix: self._fetch_all_objects(prefix=sub_prefix),
+                                                   prefixes):
+                    objects.extend(prefix_objects)
+
+        return objects
+
     @client_exception_handler()
     def fetch_bucket_objects(self, prefix: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        objects_list = self._fetch_all_objects(prefix=prefix)
+        objects_list = self.fetch_all_objects(prefix=prefix) or []
 
         for obj in objects_list:
             yield obj
@@ -284,9 +336,9 @@ class S3Storage(object):
         self._client.delete_object(Bucket=self._bucket, Key=remote_file_path)
 
     @client_exception_handler(['404'])
-    def delete_objects(self, objects: Union[Tuple[Dict[str, str]], List[Dict[str, str]]], quiet: bool = False):
+    def _delete_objects(self, objects: Union[Tuple[Dict[str, str]], List[Dict[str, str]]], quiet: bool = False):
         delete_objects = {
-            'Objects': objects,
+            'Objects': list(objects),
             'Quiet': quiet
         }
 
@@ -302,6 +354,23 @@ class S3Storage(object):
             for error in errors:
                 logger.error(f'{error.get("Message")} ({error.get("Key")}).')
 
+    def delete_objects(self, objects: Union[Tuple[Dict[str, str]], List[Dict[str, str]]], quiet: bool = False):
+        chunks = list(utils.batched(objects, MAX_DELETE_OBJECTS))
+
+        if len(chunks) <= 1:
+            for chunk in chunks:
+                self._delete_objects(objects=chunk, quiet=quiet)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_UPLOAD_WORKERS)) as executor:
+            futures = [executor.submit(self._delete_objects, objects=chunk, quiet=quiet) for chunk in chunks]
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as ex:
+                    logger.error(f'Exception {type(ex).__name__} with message: {str(ex)}.')
+
     @client_exception_handler(['404'])
     def download_file(self, local_file_path: Union[str, bytes], remote_file_path: Union[str, bytes]) -> None:
         file_info = self.get_object_info(remote_file_path=remote_file_path)
@@ -313,7 +382,7 @@ class S3Storage(object):
                                    Key=remote_file_path,
                                    Filename=local_file_path,
                                    Config=self._config,
-                                   Callback=ProgressBar(caption=f'Download file', max_value=content_length))
+                                   Callback=ProgressBar(caption=f'Download file', total=content_length))
 
     @client_exception_handler(['404'])
     def get_bucket_encryption(self):
@@ -366,7 +435,7 @@ class S3Storage(object):
 
     @client_exception_handler()
     def get_objects_count(self, prefix: Optional[str] = None) -> int:
-        objects_list = self._fetch_all_objects(prefix=prefix)
+        objects_list = self.fetch_all_objects(prefix=prefix)
 
         if objects_list is None:
             return 0
@@ -382,7 +451,7 @@ class S3Storage(object):
             prefix: str = rule.get('prefix', None)
 
             if dt is not None and prefix is not None:
-                fetched_objects = self._fetch_all_objects(prefix=prefix)
+                fetched_objects = self.fetch_all_objects(prefix=prefix) or []
 
                 for fetched_object in fetched_objects:
                     last_modified = fetched_object.get('LastModified')
@@ -392,25 +461,139 @@ class S3Storage(object):
 
         return old_objects
 
+    def _get_part_executor(self) -> Tuple[ThreadPoolExecutor, BufferPool]:
+        with self._lock:
+            if self._part_executor is None:
+                self._part_executor = ThreadPoolExecutor(max_workers=MAX_PART_UPLOADS)
+                self._part_buffers = BufferPool(MAX_PART_UPLOADS, MULTIPART_CHUNKSIZE)
+
+            return self._part_executor, self._part_buffers
+
+    def _upload_part(self,
+                     fd: int,
+                     remote_file_path: Union[str, bytes],
+                     upload_id: str,
+                     part_number: int,
+                     offset: int,
+                     size: int) -> Dict[str, Any]:
+        buffer = self._part_buffers.acquire(size)
+
+        try:
+            read_bytes = pread_into(fd, memoryview(buffer)[:size], offset)
+
+            if read_bytes != size:
+                raise IOError(errno.EIO, os.strerror(errno.EIO), remote_file_path)
+
+            body = buffer if size == len(buffer) else buffer[:size]
+
+            response = self._client.upload_part(
+                Bucket=self._bucket,
+                Key=remote_file_path,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+        finally:
+            self._part_buffers.release(buffer)
+
+        return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+    def _multipart_upload(self,
+                          local_file_path: Union[str, bytes],
+                          remote_file_path: Union[str, bytes],
+                          file_size: int,
+                          callback: Optional[Callable[[int], Any]] = None) -> None:
+        part_size = get_multipart_part_size(file_size)
+        parts_offsets = enumerate(range(0, file_size, part_size), start=1)
+        executor, _ = self._get_part_executor()
+        fd = os.open(local_file_path, os.O_RDONLY)
+
+        try:
+            response = self._client.create_multipart_upload(Bucket=self._bucket, Key=remote_file_path)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        upload_id = response['UploadId']
+
+        parts = []
+        pending = {}
+
+        def submit_next_part() -> None:
+            item = next(parts_offsets, None)
+
+            if item is not None:
+                part_number, offset = item
+                size = min(part_size, file_size - offset)
+                future = executor.submit(self._upload_part, fd, remote_file_path, upload_id,
+                                         part_number, offset, size)
+                pending[future] = size
+
+        try:
+            for _ in range(MAX_PART_UPLOADS):
+                submit_next_part()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    size = pending.pop(future)
+                    parts.append(future.result())
+
+                    if callback is not None:
+                        callback(size)
+
+                    submit_next_part()
+
+            parts.sort(key=lambda part: part['PartNumber'])
+
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=remote_file_path,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            for pending_future in pending:
+                pending_future.cancel()
+
+            if pending:
+                wait(pending)
+
+            self.abort_multipart(remote_file_path=remote_file_path, upload_id=upload_id)
+            raise
+        finally:
+            os.close(fd)
+
     @client_exception_handler()
     def upload_file(self,
                     local_file_path: Union[str, bytes],
                     remote_file_path: Union[str, bytes],
-                    show_progress: bool = True) -> None:
+                    show_progress: bool = True,
+                    callback: Optional[Callable[[int], Any]] = None) -> None:
         if os.path.isfile(local_file_path):
             local_file_size = os.stat(local_file_path).st_size
             logger.debug(f'{local_file_size=}')
 
-            if show_progress:
+            own_progress = callback is None and show_progress
+
+            if own_progress:
+                callback = ProgressBar(caption=f'Upload file {os.path.basename(remote_file_path)}',
+                                       total=local_file_size)
+
+            if local_file_size > MULTIPART_THRESHOLD:
+                self._multipart_upload(local_file_path=local_file_path,
+                                       remote_file_path=remote_file_path,
+                                       file_size=local_file_size,
+                                       callback=callback)
+            elif callback is not None:
                 self._client.upload_file(
                     local_file_path,
                     self._bucket,
                     remote_file_path,
                     Config=self._config,
-                    Callback=ProgressBar(caption=f'Upload file {os.path.basename(remote_file_path)}',
-                                         total=local_file_size)
+                    Callback=callback
                 )
-                utils.show_message('\r' + CLEAR_TO_END_LINE + '\r')
             else:
                 self._client.upload_file(
                     local_file_path,
@@ -418,8 +601,52 @@ class S3Storage(object):
                     remote_file_path,
                     Config=self._config
                 )
+
+            if own_progress:
+                utils.show_message('\r' + CLEAR_TO_END_LINE + '\r')
+
             logger.debug(f'File {remote_file_path} upload completed {CLEAR_TO_END_LINE}')
 
+    def upload_files(self, files: List[Tuple[str, str]], show_progress: bool = True) -> None:
+        files = [(local_file_path, remote_file_path) for local_file_path, remote_file_path in files
+                 if os.path.isfile(local_file_path)]
+
+        if len(files) == 0:
+            return
+
+        callback = None
+
+        if show_progress:
+            callback = ProgressBar(caption=f'Upload {len(files)} file(s)',
+                                   total=sum(os.path.getsize(local_file_path) for local_file_path, _ in files))
+
+        with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as executor:
+            futures = {}
+
+            for local_file_path, remote_file_path in files:
+                logger.info('Upload file %s...', remote_file_path)
+                future = executor.submit(self.upload_file,
+                                         local_file_path=local_file_path,
+                                         remote_file_path=remote_file_path,
+                                         show_progress=False,
+                                         callback=callback)
+                futures[future] = remote_file_path
+
+            failures = []
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as ex:
+                    logger.error(f'Exception {type(ex).__name__} with message: {str(ex)}.')
+                    failures.append((futures[future], ex))
+
+        if show_progress:
+            utils.show_message('\r' + CLEAR_TO_END_LINE + '\r')
+
+        if failures:
+            raise S3UploadError(failures)
+
     @client_exception_handler()
     def upload(self,
                local_path: Union[str, bytes],
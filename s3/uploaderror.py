@@ -0,0 +1,12 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+from typing import List, Tuple
+
+
+class S3UploadError(Exception):
+    """Some files could not be uploaded."""
+
+    def __init__(self, failures: List[Tuple[str, Exception]]):
+        self.failures = failures
+        super(S3UploadError, self).__init__(
+            f"{len(failures)} file(s) were not uploaded: {', '.join(name for name, _ in failures)}."
+        )
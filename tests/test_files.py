@@ -0,0 +1,39 @@
+#  Copyright (c) 2021. by Roman N. Krivov a.k.a. Eochaid Bres Drow
+import unittest
+
+from common import consts
+from common.files import get_etag_part_size, get_etag_parts_count, get_multipart_part_size
+
+GBYTES = 1024 * consts.MBYTES
+
+
+class EtagPartSizeTest(unittest.TestCase):
+
+    def test_upload_part_size_round_trip(self):
+        for file_size in (consts.MULTIPART_THRESHOLD + 1,
+                          consts.MULTIPART_CHUNKSIZE,
+                          consts.MULTIPART_CHUNKSIZE + 1,
+                          10 * GBYTES,
+                          consts.MAX_MULTIPART_PARTS * consts.MULTIPART_CHUNKSIZE,
+                          consts.MAX_MULTIPART_PARTS * consts.MULTIPART_CHUNKSIZE + 1,
+                          600 * GBYTES,
+                          600 * GBYTES + 1,
+                          5 * 1024 * GBYTES):
+            with self.subTest(file_size=file_size):
+                part_size = get_multipart_part_size(file_size)
+                parts_count = -(-file_size // part_size)
+                etag = f'"{"0" * 32}-{parts_count}"'
+
+                self.assertLessEqual(parts_count, consts.MAX_MULTIPART_PARTS)
+                self.assertEqual(get_etag_part_size(file_size, get_etag_parts_count(etag)), part_size)
+
+    def test_foreign_part_sizes(self):
+        file_size = 10 * GBYTES
+
+        for part_size in (8 * consts.MBYTES, 15 * consts.MBYTES, 64 * consts.MBYTES):
+            with self.subTest(part_size=part_size):
+                self.assertEqual(get_etag_part_size(file_size, -(-file_size // part_size)), part_size)
+
+
+if __name__ == '__main__':
+    unittest.main()